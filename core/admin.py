@@ -1,64 +1,168 @@
+import csv
+import io
+
 from django.contrib import admin
+from django.contrib.admin import helpers
 from django import forms
 from django.contrib.admin.widgets import AdminDateWidget
-from .models import Client, SalesMade, Interaction, TotalPayments
+from django.forms.models import BaseInlineFormSet
+from .models import Client, SalesMade, Interaction, Job, TotalPayments
+from .jobs import INLINE_LIMIT, enqueue
+from .payments import get_banner_totals, record_payments
+from .search import get_search_backend
+from .exports import csv_response, filter_created
+from .forms import DOBAdminForm, ExportOptionsForm, LeadImportUploadForm
+from .pagination import KeysetPaginationMixin, encode_cursor
+from .timeline import TIMELINE_INLINE_SIZE
+from .importers import detect_format, import_leads, open_upload
+from django.core.exceptions import PermissionDenied
 from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
 
 # ---------------------------
 # Interaction Inlines
 # ---------------------------
-class ClientInteractionInline(admin.TabularInline):
+class LatestInteractionFormSet(BaseInlineFormSet):
+    """
+    Only the newest notes; older ones are fetched from the timeline endpoint.
+    A POST edits exactly the notes the page rendered, even if newer ones
+    were added meanwhile.
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            if self.is_bound:
+                pk_name = self.model._meta.pk.name
+                pks = [self.data.get(f'{self.add_prefix(i)}-{pk_name}') for i in range(self.initial_form_count())]
+                queryset = self.queryset.filter(pk__in=[pk for pk in pks if str(pk).isdigit()])
+            else:
+                queryset = self.queryset
+            self._queryset = queryset.order_by('-date', '-id')[:TIMELINE_INLINE_SIZE]
+        return self._queryset
+
+    @property
+    def older_cursor(self):
+        entries = list(self.get_queryset())
+        return encode_cursor(entries[-1], 'date') if entries else ''
+
+
+class InteractionTimelineInline(admin.TabularInline):
     model = Interaction
+    formset = LatestInteractionFormSet
+    template = 'admin/edit_inline/interaction_timeline.html'
     extra = 0
+    timeline_owner = None
+
+class ClientInteractionInline(InteractionTimelineInline):
     exclude = ('sales_made',)  # hide completed client field for prospective client interactions
+    timeline_owner = 'client'
 
-class SalesInteractionInline(admin.TabularInline):
-    model = Interaction
-    extra = 0
+class SalesInteractionInline(InteractionTimelineInline):
     exclude = ('client',)  # hide prospective client field for sales interactions
+    timeline_owner = 'sales'
 
 # ---------------------------
-# Date of Birth Widget
+# Indexed search
 # ---------------------------
-class DOBAdminForm(forms.ModelForm):
-    date_of_birth = forms.DateField(
-        widget=forms.DateInput(format='%m-%d-%Y'),
-        input_formats=['%m-%d-%Y'],
-        required=False,
-    )
+class IndexedSearchMixin:
+    def get_search_results(self, request, queryset, search_term):
+        results = get_search_backend().search(queryset, search_term)
+        if results is None:
+            return super().get_search_results(request, queryset, search_term)
+        return results, False
 
-    class Meta:
-        model = Client
-        fields = '__all__'
+# ---------------------------
+# Streaming CSV export
+# ---------------------------
+@admin.action(description="Export selected rows to CSV")
+def export_selected_csv(modeladmin, request, queryset):
+    """Ask for columns and a created-at range, then stream the selection."""
+    model = queryset.model
+    form = ExportOptionsForm(model, request.POST if 'apply' in request.POST else None)
+    if form.is_valid():
+        rows = filter_created(queryset, form.cleaned_data['since'], form.cleaned_data['until'])
+        return csv_response(rows, form.cleaned_data['columns'], f"{model._meta.model_name}_export.csv")
+    return TemplateResponse(request, 'admin/export_options.html', {
+        **modeladmin.admin_site.each_context(request),
+        'title': "Export selected rows to CSV",
+        'opts': model._meta,
+        'form': form,
+        'select_across': request.POST.get('select_across') == '1',
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+    })
 
 # ---------------------------
 # Client Admin
 # ---------------------------
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(KeysetPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     form = DOBAdminForm
     list_display = ('first_name', 'last_name', 'email', 'status')
-    list_filter = ('status',)
+    list_filter = ('status', 'profile__payment_on')
+    readonly_fields = ('payment_on',)
     search_fields = ('first_name', 'last_name', 'email', 'phone')
+    ordering = ('-created_at', '-id')
     inlines = [ClientInteractionInline]
-    actions = ['convert_selected_clients']
+    actions = ['convert_selected_clients', export_selected_csv]
 
     # -----------------------
     # Convert selected clients to SalesMade
     # -----------------------
     def convert_selected_clients(self, request, queryset):
-        for client in queryset.filter(status='active'):
-            client.convert_to_sales_made()
-        self.message_user(request, "Selected clients were converted to Sales Made.")
+        if queryset.count() > INLINE_LIMIT:
+            jobs = enqueue('convert_clients', queryset.filter(status='active'), requested_by=request.user.get_username())
+            self.message_user(request, f"Conversion queued as {len(jobs)} background job(s); see Jobs for progress.")
+            return
+        converted = Client.objects.convert_many(queryset)
+        self.message_user(request, f"{converted} selected clients were converted to Sales Made.")
     convert_selected_clients.short_description = "Convert selected clients to Sales Made"
 
     # -----------------------
-    # Only show active clients
+    # Bulk lead import page
+    # -----------------------
+    change_list_template = "admin/client_change_list.html"
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_leads_view), name='core_client_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_leads_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        stats = None
+        error_rows = []
+        form = LeadImportUploadForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            errors = io.StringIO()
+            stats = import_leads(
+                open_upload(upload),
+                fmt=detect_format(upload.name),
+                source=form.cleaned_data['source'] or None,
+                error_writer=csv.writer(errors),
+            )
+            error_rows = list(csv.reader(io.StringIO(errors.getvalue())))[1:]
+
+        return TemplateResponse(request, 'admin/import_leads.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Import leads",
+            'form': form,
+            'stats': stats,
+            'error_rows': error_rows[:200],
+            'error_count': len(error_rows),
+        })
+
+    # -----------------------
+    # Only show active clients (equality so the partial index applies)
     # -----------------------
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.exclude(status__in=['converted', 'archived'])
+        return qs.filter(status='active')
 
     # -----------------------
     # Field layout with conditional service info
@@ -74,6 +178,7 @@ class ClientAdmin(admin.ModelAdmin):
                     'service_description',
                     'payment_amount',
                     'payment_date',
+                    'payment_on',
                     'cardholder_name',
                     'card_type',
                     'card_number',
@@ -92,10 +197,13 @@ class ClientAdmin(admin.ModelAdmin):
 # SalesMade Admin
 # ---------------------------
 @admin.register(SalesMade)
-class SalesMadeAdmin(admin.ModelAdmin):
+class SalesMadeAdmin(KeysetPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     form = DOBAdminForm
     list_display = ('first_name', 'last_name', 'email', 'phone', 'add_payment_button')
+    list_filter = ('profile__payment_on',)
+    readonly_fields = ('payment_on',)
     search_fields = ('first_name', 'last_name', 'email', 'phone')
+    ordering = ('-created_at', '-id')
 
     def total_payments_counter(self, request):
         from .models import TotalPayments
@@ -104,16 +212,15 @@ class SalesMadeAdmin(admin.ModelAdmin):
 
     inlines = [SalesInteractionInline]
 
-    actions = ['add_payment_to_total']
+    actions = ['add_payment_to_total', export_selected_csv]
 
     def add_payment_to_total(self, request, queryset):
-        total, _ = TotalPayments.objects.get_or_create(id=1)
-
-        for sale in queryset:
-            if sale.payment_amount:
-                total.total_amount += sale.payment_amount
-
-        total.save()
+        if queryset.count() > INLINE_LIMIT:
+            jobs = enqueue('add_payments', queryset, requested_by=request.user.get_username())
+            self.message_user(request, f"Payments queued as {len(jobs)} background job(s); see Jobs for progress.")
+            return
+        sales = queryset.select_related('profile').only('id', 'profile__payment_amount')
+        record_payments([(sale, sale.payment_amount) for sale in sales])
         self.message_user(request, "Selected payments were added to the total.")
 
     add_payment_to_total.short_description = "Add selected payments to total counter"
@@ -130,6 +237,7 @@ class SalesMadeAdmin(admin.ModelAdmin):
                     'service_description',
                     'payment_amount',
                     'payment_date',
+                    'payment_on',
                     'cardholder_name',
                     'card_type',
                     'card_number',
@@ -142,10 +250,10 @@ class SalesMadeAdmin(admin.ModelAdmin):
 
     # <-- ADD THIS METHOD HERE
     def changelist_view(self, request, extra_context=None):
-        from .models import TotalPayments
-        total, _ = TotalPayments.objects.get_or_create(id=1)
         extra_context = extra_context or {}
-        extra_context['total_payments'] = total
+        totals = get_banner_totals()
+        extra_context['total_payments'] = totals['total']
+        extra_context['month_payments'] = totals['month']
         return super().changelist_view(request, extra_context=extra_context)
 
     # <-- KEEP THIS AT THE VERY BOTTOM
@@ -157,4 +265,30 @@ class SalesMadeAdmin(admin.ModelAdmin):
             obj.id
         )
 
-    add_payment_button.short_description = "Actions"
\ No newline at end of file
+    add_payment_button.short_description = "Actions"
+
+
+# ---------------------------
+# Background jobs
+# ---------------------------
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress_bar', 'requested_by', 'locked_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    fields = ('kind', 'status', 'processed', 'chunk_size', 'requested_by', 'locked_by', 'locked_at',
+              'error', 'created_at', 'finished_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def progress_bar(self, obj):
+        return format_html(
+            '<progress max="100" value="{}"></progress> {} / {}',
+            obj.progress, obj.processed, obj.total
+        )
+
+    progress_bar.short_description = "Progress"
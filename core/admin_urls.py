@@ -0,0 +1,14 @@
+from django.contrib import admin
+from django.urls import path
+
+from . import admin_views
+
+app_name = 'crm_admin'
+
+urlpatterns = [
+    path('cache/', admin.site.admin_view(admin_views.cache_stats_view), name='cache_stats'),
+    path('performance/', admin.site.admin_view(admin_views.performance_view), name='performance'),
+    path('interactions/<str:owner>/<int:pk>/', admin.site.admin_view(admin_views.interaction_timeline_view),
+         name='interaction_timeline'),
+    path('reports/', admin.site.admin_view(admin_views.reports_view), name='reports'),
+]
@@ -0,0 +1,77 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+
+from . import metrics
+from .cache import cache_stats, reset_cache_stats
+from .pagination import CURSOR_VAR
+from .reporting import DIMENSIONS, funnel
+from .timeline import OWNER_FIELDS, timeline_page
+
+
+# ---------------------------
+# Cache stats
+# ---------------------------
+def cache_stats_view(request):
+    if request.method == 'POST':
+        reset_cache_stats()
+        return redirect('crm_admin:cache_stats')
+
+    return TemplateResponse(request, 'admin/cache_stats.html', {
+        **admin.site.each_context(request),
+        'title': "Cache stats",
+        'caches': cache_stats(),
+    })
+
+
+# ---------------------------
+# Slowest views
+# ---------------------------
+def performance_view(request):
+    if request.method == 'POST':
+        metrics.reset()
+        return redirect('crm_admin:performance')
+
+    return TemplateResponse(request, 'admin/performance.html', {
+        **admin.site.each_context(request),
+        'title': "Slowest views",
+        'rows': metrics.worst_offenders(),
+        'samples_per_view': metrics.SAMPLES_PER_VIEW,
+    })
+
+
+# ---------------------------
+# Funnel report
+# ---------------------------
+def reports_view(request):
+    group_by = request.GET.get('group_by', 'source')
+    if group_by not in DIMENSIONS:
+        group_by = 'source'
+    rows = funnel(group_by)
+    widest = max((row['leads'] for row in rows), default=0) or 1
+    for row in rows:
+        row['label'] = row[group_by]
+        row['leads_width'] = round(100 * row['leads'] / widest)
+        row['conversions_width'] = round(100 * row['conversions'] / widest)
+
+    return TemplateResponse(request, 'admin/reports.html', {
+        **admin.site.each_context(request),
+        'title': "Lead funnel",
+        'group_by': group_by,
+        'dimensions': DIMENSIONS,
+        'rows': rows,
+    })
+
+
+# ---------------------------
+# Interaction timeline (older notes for the change-form inlines)
+# ---------------------------
+def interaction_timeline_view(request, owner, pk):
+    if owner not in OWNER_FIELDS:
+        raise Http404
+    if not request.user.has_perm('core.view_interaction'):
+        raise PermissionDenied
+    entries, next_cursor = timeline_page(owner, pk, request.GET.get(CURSOR_VAR))
+    return JsonResponse({'entries': entries, 'next_cursor': next_cursor})
@@ -0,0 +1,85 @@
+from .snapshots import find_snapshot, load_snapshot, np
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def group_sum(keys, values):
+    """Sum ``values`` per distinct key: one np.unique and one bincount."""
+    labels, inverse = np.unique(keys, return_inverse=True)
+    return labels, np.bincount(inverse, weights=values, minlength=len(labels))
+
+
+def _text(values):
+    # Parquet hands strings back as object arrays
+    return np.asarray(values, dtype=str)
+
+
+# ---------------------------
+# Revenue
+# ---------------------------
+def revenue_stats(sales, by='state'):
+    """Booked revenue over a SalesMade snapshot, overall, per ``by`` and per month."""
+    amounts = np.nan_to_num(sales['payment_amount'].astype(np.float64))
+    paid = amounts > 0
+
+    labels, totals = group_sum(_text(sales[by]), amounts)
+    months, monthly = group_sum(sales['created_at'].astype('datetime64[M]').astype(str), amounts)
+    return {
+        'sales': int(len(amounts)),
+        'paid_sales': int(paid.sum()),
+        'revenue': round(float(amounts.sum()), 2),
+        'average_sale': round(float(amounts[paid].mean()), 2) if paid.any() else None,
+        'median_sale': round(float(np.median(amounts[paid])), 2) if paid.any() else None,
+        f"revenue_by_{by}": {label or 'unknown': round(float(total), 2) for label, total in zip(labels, totals)},
+        'revenue_by_month': {month: round(float(total), 2) for month, total in zip(months, monthly)},
+    }
+
+
+# ---------------------------
+# Conversion
+# ---------------------------
+def conversion_stats(clients, interactions=None, by='source'):
+    """Lead-to-sale conversion over a Client snapshot, overall and per ``by``."""
+    converted = clients['sales_made_id'] > 0
+    labels, inverse = np.unique(_text(clients[by]), return_inverse=True)
+    leads = np.bincount(inverse, minlength=len(labels))
+    wins = np.bincount(inverse, weights=converted, minlength=len(labels))
+
+    days = (clients['converted_at'] - clients['created_at']).astype('timedelta64[s]').astype(np.float64) / 86400
+    days = days[converted & ~np.isnat(clients['converted_at'])]
+
+    stats = {
+        'leads': int(len(converted)),
+        'converted': int(converted.sum()),
+        'conversion_rate': round(float(converted.mean()), 4) if len(converted) else None,
+        'median_days_to_convert': round(float(np.median(days)), 2) if len(days) else None,
+        f"conversion_by_{by}": {
+            label or 'unknown': {'leads': int(count), 'converted': int(won), 'rate': round(float(won / count), 4)}
+            for label, count, won in zip(labels, leads, wins)
+        },
+    }
+
+    if interactions is not None:
+        # Touches per lead, split by whether the lead converted
+        touches = np.bincount(interactions['client_id'], minlength=int(clients['id'].max(initial=0)) + 1)
+        per_lead = touches[clients['id']]
+        stats['avg_interactions_converted'] = round(float(per_lead[converted].mean()), 2) if converted.any() else None
+        stats['avg_interactions_open'] = round(float(per_lead[~converted].mean()), 2) if (~converted).any() else None
+    return stats
+
+
+def summarize(directory):
+    """Load whichever snapshots exist in ``directory`` and compute every stat."""
+    snapshots = {}
+    for name in ('client', 'sales', 'interaction'):
+        path = find_snapshot(directory, name)
+        if path:
+            snapshots[name] = load_snapshot(path)
+
+    summary = {}
+    if 'sales' in snapshots:
+        summary['revenue'] = revenue_stats(snapshots['sales'])
+    if 'client' in snapshots:
+        summary['conversion'] = conversion_stats(snapshots['client'], snapshots.get('interaction'))
+    return summary
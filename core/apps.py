@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import install_search_index_after_migrate
+        post_migrate.connect(install_search_index_after_migrate, sender=self)
+
+        from .slowlog import install_slow_query_logger
+        connection_created.connect(install_slow_query_logger)
@@ -0,0 +1,106 @@
+import threading
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0})
+
+
+# ---------------------------
+# Counting cache proxy
+# ---------------------------
+class CountingCache:
+    """
+    Thin proxy over a configured cache alias that counts hits and misses.
+
+    Counters are per process; they reset when the worker restarts.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _count(self, name, amount=1):
+        with _lock:
+            _stats[self.alias][name] += amount
+
+    def get(self, key, default=None):
+        value = self.backend.get(key, _MISSING)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def set(self, key, value, timeout=_MISSING):
+        self._count('sets')
+        if timeout is _MISSING:
+            return self.backend.set(key, value)
+        return self.backend.set(key, value, timeout)
+
+    async def aget(self, key, default=None):
+        value = await self.backend.aget(key, _MISSING)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    async def aset(self, key, value, timeout=_MISSING):
+        self._count('sets')
+        if timeout is _MISSING:
+            return await self.backend.aset(key, value)
+        return await self.backend.aset(key, value, timeout)
+
+    def delete(self, key):
+        self._count('deletes')
+        return self.backend.delete(key)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+# Small hot values: payment totals, change-list counts, list versions
+crm_cache = CountingCache('crm')
+# Rendered pages
+page_cache = CountingCache('default')
+
+
+# ---------------------------
+# Stats
+# ---------------------------
+def cache_stats():
+    """Counters and eviction settings for every configured cache."""
+    from django.conf import settings
+
+    rows = []
+    for alias, config in settings.CACHES.items():
+        with _lock:
+            counters = dict(_stats[alias])
+        lookups = counters['hits'] + counters['misses']
+        backend = caches[alias]
+        options = config.get('OPTIONS', {})
+        rows.append({
+            'alias': alias,
+            'backend': config['BACKEND'].rsplit('.', 1)[-1],
+            'location': config.get('LOCATION', ''),
+            'timeout': config.get('TIMEOUT', 300),
+            'max_entries': options.get('MAX_ENTRIES'),
+            'cull_frequency': options.get('CULL_FREQUENCY'),
+            # Only the local-memory backend can report its size cheaply
+            'entries': len(backend._cache) if isinstance(backend, LocMemCache) else None,
+            'hit_rate': counters['hits'] / lookups if lookups else None,
+            **counters,
+        })
+    return rows
+
+
+def reset_cache_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import hmac
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models.expressions import ExpressionWrapper
+from django.db.models.lookups import Exact
+
+try:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, AESSIV
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+except ImportError:  # Needed as soon as an encrypted column is read or written
+    AESGCM = None
+
+# Stored values look like "enc1:<key id>:<base64 ciphertext>"
+TOKEN_PREFIX = 'enc1:'
+KEY_ID_LENGTH = 8
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+
+# ---------------------------
+# Keys
+# ---------------------------
+class FieldKey:
+    """One entry of CRM_FIELD_KEYS with the AES keys derived from it."""
+
+    def __init__(self, secret):
+        secret = secret.encode()
+        self.id = hmac.new(secret, b'crm-field-key-id', hashlib.sha256).hexdigest()[:KEY_ID_LENGTH]
+        self.prefix = f'{TOKEN_PREFIX}{self.id}:'
+        self.randomized = AESGCM(self._derive(secret, b'crm-field-aes-gcm', 32))
+        self.deterministic = AESSIV(self._derive(secret, b'crm-field-aes-siv', 64))
+
+    @staticmethod
+    def _derive(secret, info, length):
+        return HKDF(algorithm=hashes.SHA256(), length=length, salt=None, info=info).derive(secret)
+
+
+@lru_cache(maxsize=8)
+def _keyring(secrets):
+    if AESGCM is None:
+        raise ImproperlyConfigured("Encrypted fields need the cryptography package: pip install cryptography")
+    if not secrets:
+        raise ImproperlyConfigured("CRM_FIELD_KEYS is empty.")
+    return tuple(FieldKey(secret) for secret in secrets)
+
+
+def keyring():
+    """Configured keys, current one first."""
+    return _keyring(tuple(settings.CRM_FIELD_KEYS))
+
+
+def current_key():
+    return keyring()[0]
+
+
+# ---------------------------
+# Tokens
+# ---------------------------
+def is_token(value):
+    return isinstance(value, str) and value.startswith(TOKEN_PREFIX)
+
+
+def token_length(max_length):
+    """Longest token for a plaintext of ``max_length`` characters."""
+    size = NONCE_SIZE + max_length * 4 + TAG_SIZE
+    return len(TOKEN_PREFIX) + KEY_ID_LENGTH + 1 + 4 * -(-size // 3)
+
+
+def encrypt(value, context, deterministic=False, key=None):
+    """
+    Token for ``value``; ``context`` (the column name) is authenticated with
+    it so a token can't be moved to another column. Deterministic tokens
+    (AES-SIV) are equal for equal values, which is what exact-match lookups
+    compare; randomized ones (AES-GCM) leak nothing about equality.
+    """
+    key = key or current_key()
+    data, context = value.encode(), context.encode()
+    if deterministic:
+        payload = key.deterministic.encrypt(data, [context])
+    else:
+        nonce = os.urandom(NONCE_SIZE)
+        payload = nonce + key.randomized.encrypt(nonce, data, context)
+    return key.prefix + base64.urlsafe_b64encode(payload).decode()
+
+
+def decrypt(token, context, deterministic=False):
+    key_id, _, payload = token[len(TOKEN_PREFIX):].partition(':')
+    key = next((key for key in keyring() if key.id == key_id), None)
+    if key is None:
+        raise ImproperlyConfigured(f"No key in CRM_FIELD_KEYS has id {key_id}; was it removed before rotating?")
+    payload, context = base64.urlsafe_b64decode(payload), context.encode()
+    if deterministic:
+        data = key.deterministic.decrypt(payload, [context])
+    else:
+        data = key.randomized.decrypt(payload[:NONCE_SIZE], payload[NONCE_SIZE:], context)
+    return data.decode()
+
+
+def search_tokens(value, context):
+    """Deterministic tokens of ``value`` under every key, for lookups during a rotation."""
+    return [encrypt(value, context, deterministic=True, key=key) for key in keyring()]
+
+
+# ---------------------------
+# Rotation
+# ---------------------------
+def _stored(name):
+    # The column as stored, skipping the field's decryption
+    return ExpressionWrapper(models.F(name), output_field=models.TextField())
+
+
+def encrypted_fields(model):
+    from .fields import EncryptedCharField
+    return [field for field in model._meta.concrete_fields if isinstance(field, EncryptedCharField)]
+
+
+def reencrypt(model, batch_size=500, after=0, report=None):
+    """
+    Re-encrypt every encrypted column of ``model`` under the current key,
+    encrypting plaintext left from before the columns were encrypted.
+
+    Rows are read in primary-key batches without locks and each batch is
+    written in its own short transaction. Every UPDATE only applies if the
+    stored values are still the ones that were read, so a concurrent edit
+    (already under the current key) is never overwritten. Finished rows are
+    skipped, so the job can be stopped and re-run, or resumed from the last
+    reported pk with ``after``. ``report(last_pk, updated)`` is called per
+    batch. Returns the number of rows updated.
+    """
+    fields = encrypted_fields(model)
+    if not fields:
+        return 0
+    prefix = current_key().prefix
+    stale = models.Q()
+    for field in fields:
+        stale |= models.Q(**{f'_stored_{field.name}__isnull': False}) & ~models.Q(
+            **{f'_stored_{field.name}': ''}) & ~models.Q(**{f'_stored_{field.name}__startswith': prefix})
+    pending = model._base_manager.annotate(
+        **{f'_stored_{field.name}': _stored(field.name) for field in fields}
+    ).filter(stale)
+
+    updated = 0
+    last_pk = after
+    while True:
+        batch = list(
+            pending.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', *(f'_stored_{field.name}' for field in fields))[:batch_size]
+        )
+        if not batch:
+            return updated
+        last_pk = batch[-1][0]
+        with transaction.atomic(using=pending.db):
+            for pk, *stored in batch:
+                changes, unchanged = {}, [models.Q(pk=pk)]
+                for field, value in zip(fields, stored):
+                    if value and not value.startswith(prefix):
+                        changes[field.name] = field.from_db_value(value, None, None)
+                        unchanged.append(Exact(_stored(field.name), value))
+                updated += model._base_manager.filter(*unchanged).update(**changes)
+        if report:
+            report(last_pk, updated)
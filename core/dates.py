@@ -0,0 +1,64 @@
+import re
+from datetime import datetime
+
+# Formats seen in the free-text payment_date column, US month-first first
+PAYMENT_DATE_FORMATS = (
+    '%m-%d-%Y',
+    '%m/%d/%Y',
+    '%m/%d/%y',
+    '%m-%d-%y',
+    '%m.%d.%Y',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%B %d %Y',
+    '%b %d %Y',
+    '%d %B %Y',
+    '%d %b %Y',
+)
+
+
+def parse_payment_date(value):
+    """Parse a free-text payment date; returns a date or None."""
+    if not value:
+        return None
+    # "Jan. 5th, 2024" -> "Jan 5 2024"
+    text = re.sub(r'(?<=\d)(st|nd|rd|th)\b', '', value.strip(), flags=re.IGNORECASE)
+    if re.search('[A-Za-z]', text):
+        text = text.replace('.', ' ')
+    text = ' '.join(text.replace(',', ' ').split())
+    for fmt in PAYMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def backfill_payment_on(model, batch_size=1000, report=None):
+    """
+    Fill ``payment_on`` from ``payment_date`` for rows that don't have it.
+
+    Works through the table in primary-key batches with one bulk_update
+    each, so it's safe on large tables and can be re-run. Rows whose text
+    can't be parsed are passed to ``report(pk, text)``. Returns
+    (updated, unparsable).
+    """
+    pending = model.objects.filter(payment_on__isnull=True, payment_date__isnull=False).exclude(payment_date='')
+    updated = unparsable = 0
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk).order_by('pk').only('pk', 'payment_date')[:batch_size])
+        if not batch:
+            return updated, unparsable
+        last_pk = batch[-1].pk
+        parsed = []
+        for row in batch:
+            row.payment_on = parse_payment_date(row.payment_date)
+            if row.payment_on:
+                parsed.append(row)
+            else:
+                unparsable += 1
+                if report:
+                    report(row.pk, row.payment_date)
+        model.objects.bulk_update(parsed, ['payment_on'])
+        updated += len(parsed)
@@ -0,0 +1,278 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from django.db import transaction
+
+from .models import Client, Interaction, InteractionArchive, profile_lookup
+
+# Columns read for matching; nothing else is loaded
+MATCH_COLUMNS = ('id', 'first_name', 'last_name', 'email', 'phone', 'address', 'zip_code', 'date_of_birth')
+MATCH_LOOKUPS = tuple(profile_lookup(Client, column) for column in MATCH_COLUMNS)
+
+# Blank survivor fields are filled from the merged duplicates
+FILL_FIELDS = ('phone', 'source', 'address', 'city', 'state', 'zip_code', 'date_of_birth', 'payment_amount')
+
+# Field weights for score(); only fields present on both sides count
+WEIGHTS = {'name': 3, 'phone': 3, 'dob': 2, 'address': 2, 'email': 1}
+
+DEFAULT_THRESHOLD = 0.85
+
+# Larger blocks are skipped: they are too generic to be useful and are where O(n²) creeps back in
+MAX_BLOCK_SIZE = 200
+
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'drive': 'dr', 'lane': 'ln', 'boulevard': 'blvd',
+    'court': 'ct', 'place': 'pl', 'circle': 'cir', 'highway': 'hwy', 'parkway': 'pkwy', 'apartment': 'apt',
+    'suite': 'ste', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+
+# ---------------------------
+# Normalization
+# ---------------------------
+def normalize_name(value):
+    value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z]', '', value.lower())
+
+
+def normalize_phone(value):
+    digits = re.sub(r'\D', '', value or '')
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits if len(digits) == 10 else ''
+
+
+def normalize_address(value):
+    words = re.sub(r'[^a-z0-9 ]', ' ', (value or '').lower()).split()
+    return ' '.join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def normalize_email(value):
+    local, _, domain = (value or '').lower().partition('@')
+    local = local.split('+')[0]
+    if domain in ('gmail.com', 'googlemail.com'):
+        local = local.replace('.', '')
+    return local
+
+
+def soundex(name):
+    name = normalize_name(name)
+    if not name:
+        return ''
+    code = name[0].upper()
+    previous = SOUNDEX_CODES.get(name[0], '')
+    for char in name[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def normalize(row):
+    """Matching view of one ``MATCH_COLUMNS`` row."""
+    client_id, first_name, last_name, email, phone, address, zip_code, date_of_birth = row
+    return {
+        'id': client_id,
+        'first': normalize_name(first_name),
+        'last': normalize_name(last_name),
+        'last_soundex': soundex(last_name),
+        'email': normalize_email(email),
+        'phone': normalize_phone(phone),
+        'address': normalize_address(address),
+        'zip': re.sub(r'\D', '', zip_code or '')[:5],
+        'dob': date_of_birth,
+    }
+
+
+def blocking_keys(record):
+    """Keys that put likely duplicates in the same block; a record may be in several."""
+    keys = []
+    if record['zip'] and record['last_soundex']:
+        keys.append(('zip', record['zip'], record['last_soundex']))
+    if record['phone']:
+        keys.append(('phone', record['phone']))
+    if record['dob'] and record['last_soundex']:
+        keys.append(('dob', record['dob'], record['last_soundex'], record['first'][:1]))
+    return keys
+
+
+# ---------------------------
+# Scoring
+# ---------------------------
+def _similarity(a, b):
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score(a, b):
+    """Weighted 0-1 similarity of two normalized records."""
+    parts = {'name': _similarity(f"{a['first']} {a['last']}", f"{b['first']} {b['last']}")}
+    if a['phone'] and b['phone']:
+        parts['phone'] = float(a['phone'] == b['phone'])
+    if a['dob'] and b['dob']:
+        parts['dob'] = float(a['dob'] == b['dob'])
+    if a['address'] and b['address']:
+        parts['address'] = _similarity(a['address'], b['address'])
+    if a['email'] and b['email']:
+        parts['email'] = _similarity(a['email'], b['email'])
+    if len(parts) < 2 or parts['name'] < 0.6:
+        # A name alone, or clearly different names, is never enough
+        return 0.0
+    return sum(WEIGHTS[name] * value for name, value in parts.items()) / sum(WEIGHTS[name] for name in parts)
+
+
+# ---------------------------
+# Candidate search
+# ---------------------------
+class DedupStats:
+    def __init__(self):
+        self.records = 0
+        self.blocks = 0
+        self.skipped_blocks = 0
+        self.comparisons = 0
+        self.pairs = 0
+        self.clusters = 0
+        self.merged = 0
+
+
+def _candidate_blocks(queryset, chunk_size, stats):
+    """First pass: block keys for every row, keeping only blocks with two or more ids."""
+    blocks = defaultdict(list)
+    for row in queryset.values_list(*MATCH_LOOKUPS).iterator(chunk_size=chunk_size):
+        stats.records += 1
+        record = normalize(row)
+        for key in blocking_keys(record):
+            blocks[key].append(record['id'])
+    return [ids for ids in blocks.values() if len(ids) > 1]
+
+
+def _load_records(queryset, ids, chunk_size):
+    records = {}
+    ids = sorted(ids)
+    for start in range(0, len(ids), chunk_size):
+        for row in queryset.filter(id__in=ids[start:start + chunk_size]).values_list(*MATCH_LOOKUPS):
+            records[row[0]] = normalize(row)
+    return records
+
+
+def find_duplicates(queryset=None, threshold=DEFAULT_THRESHOLD, max_block_size=MAX_BLOCK_SIZE, chunk_size=5000):
+    """
+    Group likely duplicate clients.
+
+    Rows are streamed once to build blocking keys; only ids that share a
+    block are loaded again and compared, pairwise within their block.
+    Matching pairs are joined with union-find. Returns (clusters, stats)
+    where each cluster is a sorted list of client ids.
+    """
+    if queryset is None:
+        queryset = Client.objects.exclude(status='archived')
+    queryset = queryset.order_by()
+    stats = DedupStats()
+
+    blocks = _candidate_blocks(queryset, chunk_size, stats)
+    stats.blocks = len(blocks)
+    kept = [ids for ids in blocks if len(ids) <= max_block_size]
+    stats.skipped_blocks = len(blocks) - len(kept)
+    records = _load_records(queryset, {client_id for ids in kept for client_id in ids}, chunk_size)
+
+    parent = {}
+
+    def find(client_id):
+        root = client_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while client_id != root:
+            parent[client_id], client_id = root, parent.get(client_id, client_id)
+        return root
+
+    seen = set()
+    for ids in kept:
+        members = [records[client_id] for client_id in ids if client_id in records]
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a['id'], b['id']) if a['id'] < b['id'] else (b['id'], a['id'])
+                if pair in seen:
+                    # Already compared through another shared key
+                    continue
+                seen.add(pair)
+                stats.comparisons += 1
+                if score(a, b) >= threshold:
+                    stats.pairs += 1
+                    root_a, root_b = find(a['id']), find(b['id'])
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = defaultdict(list)
+    for client_id in parent:
+        clusters[find(client_id)].append(client_id)
+    result = sorted(sorted(set(members) | {root}) for root, members in clusters.items())
+    stats.clusters = len(result)
+    return result, stats
+
+
+# ---------------------------
+# Merging
+# ---------------------------
+def merge_cluster(ids):
+    """
+    Merge one cluster into a single surviving client.
+
+    The survivor is the converted client if there is one, otherwise the
+    oldest. Interactions (live and archived) move to the survivor with one
+    UPDATE per table, blank survivor fields are filled from the others and
+    the others are archived. Clients linked to a different SalesMade are left alone.
+    Returns the survivor and the merged ids.
+    """
+    with transaction.atomic():
+        clients = list(Client.objects.select_for_update(of=('self',)).filter(id__in=ids).select_related('profile').order_by('id'))
+        if len(clients) < 2:
+            return None, []
+        survivor = next((client for client in clients if client.sales_made_id), clients[0])
+        duplicates = [
+            client for client in clients
+            if client is not survivor and client.status != 'archived'
+            and not (client.sales_made_id and client.sales_made_id != survivor.sales_made_id)
+        ]
+        if not duplicates:
+            return survivor, []
+
+        changed = []
+        for field in FILL_FIELDS:
+            if getattr(survivor, field) in (None, ''):
+                value = next((getattr(client, field) for client in duplicates if getattr(client, field) not in (None, '')), None)
+                if value is not None:
+                    setattr(survivor, field, value)
+                    changed.append(field)
+        if changed:
+            survivor.save()
+
+        merged = [client.id for client in duplicates]
+        moved = {'client_id': survivor.id}
+        if survivor.sales_made_id:
+            moved['sales_made_id'] = survivor.sales_made_id
+        Interaction.objects.filter(client_id__in=merged).update(**moved)
+        # Archived notes too, or they drop out of the survivor's timeline
+        InteractionArchive.objects.filter(client_id__in=merged).update(**moved)
+        Client.objects.filter(id__in=merged).update(status='archived')
+    return survivor, merged
+
+
+def merge_duplicates(clusters, stats=None):
+    merged = 0
+    for ids in clusters:
+        merged += len(merge_cluster(ids)[1])
+    if stats is not None:
+        stats.merged = merged
+    if merged:
+        # update() doesn't send post_save
+        from .signals import mark_sales_list_changed
+        transaction.on_commit(mark_sales_list_changed)
+    return merged
@@ -0,0 +1,94 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import PROFILE_FIELDS, Client, SalesMade, profile_lookup
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX export is optional
+    Workbook = None
+
+# Card and identity columns are only exported when asked for by name
+SENSITIVE_COLUMNS = ('ssn_last4', 'mother_maiden_name', 'card_number', 'card_expiration', 'card_cvv')
+
+EXPORT_MODELS = {
+    'client': Client,
+    'sales': SalesMade,
+}
+
+
+class Echo:
+    """File-like object that hands each written line straight back."""
+
+    def write(self, value):
+        return value
+
+
+# ---------------------------
+# Columns and filters
+# ---------------------------
+def available_columns(model):
+    columns = [field.attname for field in model._meta.concrete_fields if field.name != 'profile']
+    if hasattr(model, 'profile'):
+        columns += PROFILE_FIELDS
+    return columns
+
+
+def default_columns(model):
+    return [column for column in available_columns(model) if column not in SENSITIVE_COLUMNS]
+
+
+def resolve_columns(model, columns=None):
+    if not columns:
+        return default_columns(model)
+    unknown = set(columns) - set(available_columns(model))
+    if unknown:
+        raise ValueError(f"Unknown {model._meta.model_name} columns: {', '.join(sorted(unknown))}")
+    return list(columns)
+
+
+def filter_created(queryset, since=None, until=None):
+    """Restrict to rows created between two dates, both inclusive."""
+    if since:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+    if until:
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min)))
+    return queryset
+
+
+# ---------------------------
+# Row streaming
+# ---------------------------
+def iter_rows(queryset, columns, chunk_size=2000):
+    """Yield the header and then one tuple per row, ``chunk_size`` rows per fetch."""
+    yield columns
+    lookups = [profile_lookup(queryset.model, column) for column in columns]
+    yield from queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(queryset, columns, chunk_size=2000):
+    writer = csv.writer(Echo())
+    for row in iter_rows(queryset, columns, chunk_size):
+        yield writer.writerow(row)
+
+
+def csv_response(queryset, columns, filename, chunk_size=2000):
+    response = StreamingHttpResponse(iter_csv(queryset, columns, chunk_size), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_xlsx(queryset, columns, path, chunk_size=2000):
+    if Workbook is None:
+        raise RuntimeError("XLSX export needs openpyxl (pip install openpyxl).")
+    # write_only mode flushes rows to disk instead of keeping the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    rows = 0
+    for rows, row in enumerate(iter_rows(queryset, columns, chunk_size)):
+        sheet.append(row)
+    workbook.save(path)
+    return rows
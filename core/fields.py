@@ -0,0 +1,78 @@
+from django.db import models
+from django.db.models import lookups
+
+from . import crypto
+
+
+class EncryptedCharField(models.CharField):
+    """
+    CharField stored encrypted (see core.crypto). ``max_length`` applies to
+    the plaintext; the column is sized for the token.
+
+    Values are decrypted as rows are loaded, so querysets that don't show
+    these columns should leave them out with ``defer``/``only`` (see
+    ProfileOwnerQuerySet.with_profile). Randomized fields support no lookups
+    except ``isnull``; ``deterministic=True`` fields also support ``exact``
+    and ``in``, matching rows under any configured key. Values that aren't
+    tokens (rows not encrypted yet) are returned as they are.
+    """
+
+    def __init__(self, *args, deterministic=False, **kwargs):
+        self.deterministic = deterministic
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.deterministic:
+            kwargs['deterministic'] = True
+        return name, path, args, kwargs
+
+    def db_type_parameters(self, connection):
+        return {**super().db_type_parameters(connection), 'max_length': crypto.token_length(self.max_length)}
+
+    def get_lookup(self, lookup_name):
+        if lookup_name == 'isnull' or (self.deterministic and lookup_name in ('exact', 'in')):
+            return super().get_lookup(lookup_name)
+        return None
+
+    def get_transform(self, lookup_name):
+        return None
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value in (None, '') or crypto.is_token(value):
+            return value
+        return crypto.encrypt(value, self.column, self.deterministic)
+
+    def from_db_value(self, value, expression, connection):
+        if crypto.is_token(value):
+            return crypto.decrypt(value, self.column, self.deterministic)
+        return value
+
+    def search_tokens(self, value):
+        value = self.to_python(value)
+        return [value] if value in (None, '') else crypto.search_tokens(value, self.column)
+
+
+@EncryptedCharField.register_lookup
+class EncryptedIn(lookups.In):
+    """Matches each value's token under every key, so lookups keep working mid-rotation."""
+
+    def get_prep_lookup(self):
+        values = super().get_prep_lookup()
+        if not self.rhs_is_direct_value():
+            return values
+        return [token for value in values for token in self.lhs.output_field.search_tokens(value)]
+
+
+@EncryptedCharField.register_lookup
+class EncryptedExact(EncryptedIn):
+    lookup_name = 'exact'
+
+    def get_prep_lookup(self):
+        if self.rhs is None:
+            # Turned into isnull by the query
+            return None
+        if self.rhs_is_direct_value():
+            self.rhs = [self.rhs]
+        return super().get_prep_lookup()
@@ -0,0 +1,85 @@
+from django import forms
+
+from .exports import available_columns, default_columns
+from .models import PROFILE_FIELDS, Client, Profile
+
+
+# ---------------------------
+# Shared profile fields
+# ---------------------------
+# The Profile columns as plain form fields, so Client/SalesMade forms and
+# admin fieldsets can list them like their own
+ProfileFieldsForm = type('ProfileFieldsForm', (forms.Form,), forms.fields_for_model(Profile))
+
+
+class ProfileModelForm(ProfileFieldsForm, forms.ModelForm):
+    """ModelForm for Client/SalesMade that also edits the shared Profile."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.profile_id:
+            for name in PROFILE_FIELDS:
+                if name in self.fields:
+                    self.initial.setdefault(name, getattr(self.instance, name))
+
+    def _post_clean(self):
+        super()._post_clean()
+        for name in PROFILE_FIELDS:
+            if name in self.fields and name in self.cleaned_data and self.cleaned_data[name] != getattr(self.instance, name):
+                setattr(self.instance, name, self.cleaned_data[name])
+
+
+# ---------------------------
+# Date of Birth Widget
+# ---------------------------
+class DOBAdminForm(ProfileModelForm):
+    date_of_birth = forms.DateField(
+        widget=forms.DateInput(format='%m-%d-%Y'),
+        input_formats=['%m-%d-%Y'],
+        required=False,
+    )
+
+    class Meta:
+        model = Client
+        fields = '__all__'
+
+
+# ---------------------------
+# Bulk lead import
+# ---------------------------
+class LeadImportRowForm(DOBAdminForm):
+    """Validates one imported row with the admin's rules."""
+
+    class Meta(DOBAdminForm.Meta):
+        exclude = ('sales_made', 'status')
+
+    def validate_unique(self):
+        # Emails are deduplicated per batch by the importer
+        pass
+
+
+class LeadImportUploadForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or JSON Lines (.jsonl).")
+    source = forms.CharField(max_length=100, required=False, help_text="Stored on leads that have no source.")
+
+
+# ---------------------------
+# Admin export options
+# ---------------------------
+class ExportOptionsForm(forms.Form):
+    """Columns and created-at range for the admin CSV export action."""
+    columns = forms.MultipleChoiceField(widget=forms.CheckboxSelectMultiple)
+    since = forms.DateField(required=False, label="Created on or after", widget=forms.DateInput(attrs={'type': 'date'}))
+    until = forms.DateField(required=False, label="Created on or before", widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def __init__(self, model, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['columns'].choices = [(column, column) for column in available_columns(model)]
+        self.fields['columns'].initial = default_columns(model)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get('since'), cleaned_data.get('until')
+        if since and until and since > until:
+            raise forms.ValidationError("The start date is after the end date.")
+        return cleaned_data
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from .forms import LeadImportRowForm
+from .models import Client
+from .reporting import record_leads
+
+ERROR_REPORT_COLUMNS = ('line', 'email', 'error')
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.rows} rows: {self.inserted} inserted, {self.duplicates} duplicates, "
+                f"{self.invalid} invalid ({self.rows_per_second:.0f} rows/s)")
+
+
+# ---------------------------
+# Streaming readers
+# ---------------------------
+def iter_records(fileobj, fmt):
+    """Yield ``(line_number, record_dict)`` without reading the whole file."""
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(fileobj, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as exc:
+                    yield line_number, exc
+    else:
+        # Line 1 is the header
+        for line_number, record in enumerate(csv.DictReader(fileobj), start=2):
+            yield line_number, record
+
+
+def detect_format(name):
+    return 'jsonl' if name.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def open_upload(uploaded_file):
+    return io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# ---------------------------
+# Import
+# ---------------------------
+def import_leads(fileobj, fmt='csv', batch_size=1000, source=None, error_writer=None, on_batch=None):
+    """
+    Import leads from a CSV or JSONL stream.
+
+    Each batch is validated with the admin form rules, deduplicated on
+    email (inside the file and against the table with one IN lookup) and
+    inserted with a single bulk_create. If that fails (e.g. an email was
+    inserted concurrently since the lookup) the batch is retried row by
+    row and the rows that still fail are rejected. Rejected rows go to
+    ``error_writer`` (a csv.writer); ``on_batch(batch_number, stats)`` is
+    called after every batch. Returns the overall ImportStats.
+    """
+    total = ImportStats()
+    seen_emails = set()
+    if error_writer:
+        error_writer.writerow(ERROR_REPORT_COLUMNS)
+
+    for number, batch in enumerate(_batches(iter_records(fileobj, fmt), batch_size), start=1):
+        start = time.perf_counter()
+        stats = ImportStats()
+        stats.rows = len(batch)
+
+        leads, line_numbers = {}, {}
+        for line_number, record in batch:
+            if not isinstance(record, dict):
+                _reject(stats, error_writer, line_number, '', f"Unreadable line: {record}")
+                continue
+            if source and not record.get('source'):
+                record = {**record, 'source': source}
+            form = LeadImportRowForm(data=record)
+            if not form.is_valid():
+                errors = '; '.join(f"{field}: {' '.join(messages)}" for field, messages in form.errors.items())
+                _reject(stats, error_writer, line_number, record.get('email', ''), errors)
+                continue
+            lead = form.save(commit=False)
+            if lead.email in seen_emails or lead.email in leads:
+                stats.duplicates += 1
+                continue
+            leads[lead.email] = lead
+            line_numbers[lead.email] = line_number
+
+        existing = set(Client.objects.filter(email__in=list(leads)).values_list('email', flat=True))
+        new_leads = [lead for email, lead in leads.items() if email not in existing]
+        try:
+            with transaction.atomic():
+                Client.objects.bulk_create(new_leads, batch_size=batch_size)
+                # bulk_create doesn't send post_save
+                record_leads(new_leads)
+            inserted = new_leads
+        except IntegrityError:
+            inserted = _insert_one_by_one(new_leads, line_numbers, stats, error_writer)
+        seen_emails.update(leads)
+
+        stats.duplicates += len(existing)
+        stats.inserted = len(inserted)
+        stats.seconds = time.perf_counter() - start
+        for field in ('rows', 'inserted', 'duplicates', 'invalid', 'seconds'):
+            setattr(total, field, getattr(total, field) + getattr(stats, field))
+        if on_batch:
+            on_batch(number, stats)
+
+    return total
+
+
+def _insert_one_by_one(leads, line_numbers, stats, error_writer):
+    """Insert each lead in its own savepoint; returns the ones inserted."""
+    inserted = []
+    with transaction.atomic():
+        for lead in leads:
+            # Undo what the rolled-back bulk_create assigned
+            lead.pk = None
+            if lead.has_cached_profile():
+                lead.profile.pk = None
+            try:
+                with transaction.atomic():
+                    Client.objects.bulk_create([lead])
+            except IntegrityError as exc:
+                _reject(stats, error_writer, line_numbers[lead.email], lead.email, f"Not inserted: {exc}")
+            else:
+                inserted.append(lead)
+        record_leads(inserted)
+    return inserted
+
+
+def _reject(stats, error_writer, line_number, email, message):
+    stats.invalid += 1
+    if error_writer:
+        error_writer.writerow((line_number, email, message))
@@ -0,0 +1,125 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Client, Job, SalesMade
+from .payments import record_payments
+
+logger = logging.getLogger(__name__)
+
+# Selections above this size are queued instead of run inside the request
+INLINE_LIMIT = 500
+# Ids per Job row; bigger selections are split so workers can share them
+JOB_MAX_ITEMS = 10000
+# A running job whose lease is older than this is assumed orphaned
+LEASE_TIMEOUT = timedelta(minutes=5)
+
+
+# ---------------------------
+# Handlers (one chunk of ids each)
+# ---------------------------
+def _convert_clients(ids):
+    Client.objects.convert_many(Client.objects.filter(pk__in=ids), batch_size=len(ids))
+
+
+def _add_payments(ids):
+    sales = SalesMade.objects.filter(pk__in=ids).select_related('profile').only('id', 'profile__payment_amount')
+    record_payments([(sale, sale.payment_amount) for sale in sales])
+
+
+HANDLERS = {
+    'convert_clients': _convert_clients,
+    'add_payments': _add_payments,
+}
+
+
+# ---------------------------
+# Enqueue
+# ---------------------------
+def enqueue(kind, queryset, requested_by='', chunk_size=500):
+    """Queue ``kind`` over every row in ``queryset``. Returns the created jobs."""
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    return Job.objects.bulk_create([
+        Job(kind=kind, object_ids=ids[start:start + JOB_MAX_ITEMS], chunk_size=chunk_size,
+            requested_by=requested_by)
+        for start in range(0, len(ids), JOB_MAX_ITEMS)
+    ])
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(worker):
+    """
+    Take the oldest queued job, or a running one whose lease went stale.
+
+    The claim is a conditional UPDATE, so two workers never get the same job.
+    """
+    now = timezone.now()
+    claimable = Q(status='queued') | Q(status='running', locked_at__lt=now - LEASE_TIMEOUT)
+    for pk in Job.objects.filter(claimable).order_by('created_at', 'pk').values_list('pk', flat=True)[:10]:
+        claimed = Job.objects.filter(claimable, pk=pk).update(status='running', locked_by=worker, locked_at=now)
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run_job(job, worker):
+    """
+    Work through ``job`` chunk by chunk from its last checkpoint.
+
+    Each chunk and its checkpoint commit together, so a worker that dies
+    mid-job leaves the job resumable exactly where it stopped.
+    """
+    handler = HANDLERS[job.kind]
+    try:
+        while job.processed < job.total:
+            chunk = job.object_ids[job.processed:job.processed + job.chunk_size]
+            with transaction.atomic():
+                handler(chunk)
+                job.processed += len(chunk)
+                still_ours = Job.objects.filter(pk=job.pk, locked_by=worker).update(
+                    processed=job.processed, locked_at=timezone.now())
+                if not still_ours:
+                    # Our lease expired and another worker took over
+                    transaction.set_rollback(True)
+                    return
+    except Exception as exc:
+        logger.exception("Job %s failed", job.pk)
+        Job.objects.filter(pk=job.pk, locked_by=worker).update(
+            status='failed', error=str(exc), finished_at=timezone.now())
+        return
+    Job.objects.filter(pk=job.pk, locked_by=worker).update(status='done', finished_at=timezone.now())
+
+
+def process_next_job(worker=None):
+    worker = worker or worker_name()
+    job = claim_job(worker)
+    if job is None:
+        return None
+    run_job(job, worker)
+    return job
+
+
+def work(poll_interval=1.0, once=False):
+    """Worker loop; with ``once`` it stops when the queue is empty."""
+    worker = worker_name()
+    while True:
+        try:
+            job = process_next_job(worker)
+        finally:
+            connection.close_if_unusable_or_obsolete()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
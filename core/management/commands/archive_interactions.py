@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.timeline import archive_interactions
+
+
+class Command(BaseCommand):
+    help = "Move interactions older than a cutoff into the compressed InteractionArchive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1:
+            raise CommandError("--older-than-days must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        moved = archive_interactions(cutoff, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} interactions dated before {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.dates import backfill_payment_on
+from core.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Parse payment_date into payment_on for rows that are still missing it and list the unparsable ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        def report(pk, text):
+            self.stdout.write(f"  Profile #{pk}: can't parse {text!r}")
+
+        updated, unparsable = backfill_payment_on(Profile, options['batch_size'], report)
+        style = self.style.WARNING if unparsable else self.style.SUCCESS
+        self.stdout.write(style(f"{updated} payment dates backfilled, {unparsable} unparsable."))
@@ -0,0 +1,83 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory
+
+from core import views
+from core.models import Client, SalesMade
+from core.reporting import rebuild_funnel
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec of the sync (WSGI) and async (ASGI) sales_made_list views "
+        "as concurrency grows. Views are called in-process, without an HTTP server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', default='1,4,16,64')
+        parser.add_argument('--rows', type=int, default=200, help="Converted clients to create.")
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help="Miss the page cache on every request (each one gets its own unparsable cursor, "
+                 "which still renders the first page).",
+        )
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        self._seed(tag, options['rows'])
+        try:
+            self.stdout.write(f"{'concurrency':>11}  {'WSGI req/s':>10}  {'ASGI req/s':>10}")
+            for concurrency in [int(value) for value in options['concurrency'].split(',')]:
+                wsgi = self._run_wsgi(options['requests'], concurrency, options['cold'])
+                asgi = asyncio.run(self._run_asgi(options['requests'], concurrency, options['cold']))
+                self.stdout.write(f"{concurrency:>11}  {wsgi:>10.0f}  {asgi:>10.0f}")
+        finally:
+            Client.objects.filter(email__startswith=f"bench-{tag}-").delete()
+            SalesMade.objects.filter(email__startswith=f"bench-{tag}-").delete()
+            # The seeded leads and conversions were counted into the funnel rollups
+            rebuild_funnel()
+
+    def _seed(self, tag, rows):
+        Client.objects.bulk_create([
+            Client(first_name='Bench', last_name=str(i), email=f"bench-{tag}-{i}@example.com")
+            for i in range(rows)
+        ])
+        Client.objects.convert_many(Client.objects.filter(email__startswith=f"bench-{tag}-"))
+
+    def _path(self, cold, number):
+        return f"/sales-made/?cursor=cold-{self._run}_{number}" if cold else "/sales-made/"
+
+    def _run_wsgi(self, requests, concurrency, cold):
+        factory = RequestFactory()
+        self._run = uuid.uuid4().hex
+
+        def call(number):
+            try:
+                return views.sales_made_list(factory.get(self._path(cold, number))).status_code
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(call, range(requests)))
+        return requests / (time.perf_counter() - start)
+
+    async def _run_asgi(self, requests, concurrency, cold):
+        factory = AsyncRequestFactory()
+        self._run = uuid.uuid4().hex
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(number):
+            async with semaphore:
+                return (await views.async_sales_made_list(factory.get(self._path(cold, number)))).status_code
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call(number) for number in range(requests)))
+        return requests / (time.perf_counter() - start)
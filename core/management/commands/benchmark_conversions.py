@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Client
+
+
+class Command(BaseCommand):
+    help = "Compare per-row and batched Client -> SalesMade conversion. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        with transaction.atomic():
+            queryset = self._make_clients('per-row', rows)
+            start = time.perf_counter()
+            for client in queryset:
+                client.convert_to_sales_made()
+            per_row = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        with transaction.atomic():
+            queryset = self._make_clients('batched', rows)
+            start = time.perf_counter()
+            Client.objects.convert_many(queryset, batch_size=options['batch_size'])
+            batched = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"per-row:  {rows} clients in {per_row:.2f}s ({rows / per_row:.0f}/s)")
+        self.stdout.write(f"batched:  {rows} clients in {batched:.2f}s ({rows / batched:.0f}/s)")
+        self.stdout.write(self.style.SUCCESS(f"speedup:  {per_row / batched:.1f}x"))
+
+    def _make_clients(self, tag, rows):
+        Client.objects.bulk_create([
+            Client(first_name='Bench', last_name=str(i), email=f"bench-{tag}-{i}@example.com")
+            for i in range(rows)
+        ], batch_size=1000)
+        return Client.objects.filter(email__startswith=f"bench-{tag}-")
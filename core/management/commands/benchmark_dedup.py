@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.dedup import find_duplicates, merge_duplicates
+from core.models import Client
+
+FIRST_NAMES = ('John', 'Maria', 'James', 'Linda', 'Robert', 'Patricia', 'Michael', 'Jennifer', 'David', 'Susan')
+LAST_NAMES = ('Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez')
+
+
+class Command(BaseCommand):
+    help = "Time fuzzy dedup over generated leads with planted near-duplicates. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--duplicate-rate', type=float, default=0.02)
+        parser.add_argument('--merge', action='store_true', help="Also time merging the clusters.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            planted = 0
+            for offset in range(0, rows, 10000):
+                batch = []
+                for i in range(offset, min(offset + 10000, rows)):
+                    batch.append(self._lead(i, rng))
+                    if rng.random() < options['duplicate_rate']:
+                        batch.append(self._near_duplicate(batch[-1], i, rng))
+                        planted += 1
+                Client.objects.bulk_create(batch)
+            self.stdout.write(f"Inserted {rows + planted} leads ({planted} planted duplicates) in {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            clusters, stats = find_duplicates()
+            elapsed = time.perf_counter() - start
+            found = sum(len(ids) - 1 for ids in clusters)
+            self.stdout.write(
+                f"dedup:    {stats.records} clients, {stats.comparisons} comparisons "
+                f"({stats.records * (stats.records - 1) // 2} pairwise), {elapsed:.1f}s ({stats.records / elapsed:.0f}/s)"
+            )
+            self.stdout.write(f"found:    {found} duplicates in {stats.clusters} clusters (planted {planted})")
+
+            if options['merge']:
+                start = time.perf_counter()
+                merged = merge_duplicates(clusters, stats)
+                self.stdout.write(f"merge:    {merged} clients in {time.perf_counter() - start:.1f}s")
+            transaction.set_rollback(True)
+
+    def _lead(self, i, rng):
+        return Client(
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=f"{rng.choice(LAST_NAMES)}{i % 5000}",
+            email=f"dedup-{i}@example.com",
+            phone=f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{i % 10000:04d}",
+            address=f"{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} Street",
+            zip_code=f"{rng.randint(10000, 99999)}",
+        )
+
+    def _near_duplicate(self, lead, i, rng):
+        # Same person: different email, reformatted phone, abbreviated street, maybe a typo
+        digits = ''.join(char for char in lead.phone if char.isdigit())
+        last_name = lead.last_name
+        if rng.random() < 0.5:
+            position = rng.randrange(1, len(last_name))
+            last_name = last_name[:position] + last_name[position + 1:]
+        return Client(
+            first_name=lead.first_name.upper(),
+            last_name=last_name,
+            email=f"dedup-copy-{i}@example.net",
+            phone=f"1-{digits[:3]}-{digits[3:6]}-{digits[6:]}",
+            address=lead.address.replace('Street', 'St.'),
+            zip_code=lead.zip_code,
+        )
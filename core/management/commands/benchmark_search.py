@@ -0,0 +1,57 @@
+import time
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Client
+
+TERMS = ('smith', 'lead-4242', '555-01', 'example.org')
+
+
+class Command(BaseCommand):
+    help = "Compare icontains and indexed admin search over generated leads. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        model_admin = admin.site._registry[Client]
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            for offset in range(0, rows, 10000):
+                Client.objects.bulk_create([
+                    Client(
+                        first_name=f"First{i % 5000}",
+                        last_name='Smith' if i % 1000 == 0 else f"Last{i % 20000}",
+                        email=f"lead-{i}@example.{'org' if i % 2 else 'com'}",
+                        phone=f"555-{i % 100:02d}-{i % 10000:04d}",
+                    )
+                    for i in range(offset, min(offset + 10000, rows))
+                ])
+            self.stdout.write(f"Inserted {rows} leads in {time.perf_counter() - start:.1f}s")
+
+            queryset = Client.objects.all()
+            for term in TERMS:
+                baseline = self._time(options['repeat'], lambda: admin.ModelAdmin.get_search_results(
+                    model_admin, None, queryset, term))
+                indexed = self._time(options['repeat'], lambda: model_admin.get_search_results(
+                    None, queryset, term))
+                self.stdout.write(
+                    f"{term!r:15} icontains {baseline * 1000:8.1f}ms   indexed {indexed * 1000:8.1f}ms"
+                )
+            transaction.set_rollback(True)
+
+    def _time(self, repeat, search):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results, _ = search()
+            list(results.values_list('id', flat=True)[:100])
+            results.count()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Client
+
+TABLES = ('core_client', 'core_salesmade', 'core_profile')
+
+
+def table_sizes():
+    """Bytes used by each of TABLES, indexes included."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT relname, pg_total_relation_size(oid) FROM pg_class WHERE relname = ANY(%s)", [list(TABLES)]
+            )
+        else:
+            cursor.execute(
+                "SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s JOIN sqlite_master m ON s.name = m.name "
+                "WHERE m.tbl_name IN (%s) GROUP BY m.tbl_name" % ', '.join(['%s'] * len(TABLES)), TABLES
+            )
+        return dict(cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = "Measure Client/SalesMade/Profile storage and conversion latency on generated leads. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--per-row', type=int, default=500, help="Leads converted one at a time.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            for offset in range(0, rows, 5000):
+                Client.objects.bulk_create([self._lead(i) for i in range(offset, min(offset + 5000, rows))])
+            before = table_sizes()
+
+            leads = list(Client.objects.filter(email__startswith='storage-').order_by('pk')[:options['per_row']])
+            start = time.perf_counter()
+            for lead in leads:
+                lead.convert_to_sales_made()
+            per_row = (time.perf_counter() - start) / max(len(leads), 1)
+
+            start = time.perf_counter()
+            converted = Client.objects.convert_many(
+                Client.objects.filter(email__startswith='storage-'), batch_size=options['batch_size'],
+            )
+            batched = time.perf_counter() - start
+            after = table_sizes()
+            transaction.set_rollback(True)
+
+        total_before, total_after = sum(before.values()), sum(after.values())
+        for table in TABLES:
+            if table in before or table in after:
+                self.stdout.write(
+                    f"{table:16} {before.get(table, 0) / 1024:10.0f} KiB -> {after.get(table, 0) / 1024:10.0f} KiB"
+                )
+        converted += len(leads)
+        self.stdout.write(f"{'total':16} {total_before / 1024:10.0f} KiB -> {total_after / 1024:10.0f} KiB")
+        self.stdout.write(f"conversion adds {(total_after - total_before) / converted:.0f} bytes per sale")
+        self.stdout.write(f"per-row convert: {per_row * 1000:.2f}ms per lead")
+        self.stdout.write(f"batched convert: {converted - len(leads)} leads in {batched:.2f}s")
+
+    def _lead(self, i):
+        return Client(
+            first_name='Storage',
+            last_name=f"Lead{i}",
+            email=f"storage-{i}@example.com",
+            phone=f"555-{i % 10000:04d}",
+            address=f"{i} Main Street",
+            city='Austin',
+            state='TX',
+            zip_code='78701',
+            qualification_notes="Qualified on first call; wants the premium plan and a follow-up next week.",
+            service_description="Debt consolidation with monthly autopay.",
+            payment_amount='199.00',
+            payment_date='03-15-2025',
+            cardholder_name=f"Storage Lead{i}",
+            card_type='Visa',
+            card_number='4111111111111111',
+            card_expiration='12/29',
+            card_cvv='123',
+        )
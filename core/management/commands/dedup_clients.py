@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.dedup import DEFAULT_THRESHOLD, MAX_BLOCK_SIZE, find_duplicates, merge_duplicates
+from core.models import Client
+
+
+class Command(BaseCommand):
+    help = "Find fuzzy duplicate clients (blocked by zip + last-name soundex, phone and birth date) and optionally merge them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+        parser.add_argument('--max-block-size', type=int, default=MAX_BLOCK_SIZE)
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--merge', action='store_true', help="Merge each cluster (default is a dry run).")
+        parser.add_argument('--show', type=int, default=20, help="Clusters to list.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        clusters, stats = find_duplicates(
+            threshold=options['threshold'],
+            max_block_size=options['max_block_size'],
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(
+            f"{stats.records} clients, {stats.blocks} blocks ({stats.skipped_blocks} too large), "
+            f"{stats.comparisons} comparisons, {stats.clusters} clusters in {time.perf_counter() - start:.1f}s"
+        )
+
+        for ids in clusters[:options['show']]:
+            names = Client.objects.filter(id__in=ids).order_by('id').values_list('id', 'first_name', 'last_name', 'email')
+            self.stdout.write('  ' + ' | '.join(f"#{pk} {first} {last} <{email}>" for pk, first, last, email in names))
+
+        if options['merge']:
+            merged = merge_duplicates(clusters, stats)
+            self.stdout.write(self.style.SUCCESS(f"Merged {merged} duplicates into {stats.clusters} clients."))
@@ -0,0 +1,54 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORT_MODELS, filter_created, iter_csv, resolve_columns, write_xlsx
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%m-%d-%Y').date()
+
+
+class Command(BaseCommand):
+    help = "Stream Client or SalesMade rows to CSV/XLSX with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(EXPORT_MODELS))
+        parser.add_argument('--output', '-o', help="File to write (CSV defaults to stdout).")
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+        parser.add_argument('--columns', help="Comma-separated column names.")
+        parser.add_argument('--since', type=parse_date, help="Created on or after (MM-DD-YYYY).")
+        parser.add_argument('--until', type=parse_date, help="Created on or before (MM-DD-YYYY).")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        model = EXPORT_MODELS[options['model']]
+        try:
+            columns = resolve_columns(model, options['columns'].split(',') if options['columns'] else None)
+        except ValueError as exc:
+            raise CommandError(exc)
+        queryset = filter_created(model.objects.all(), options['since'], options['until'])
+
+        start = time.perf_counter()
+        if options['format'] == 'xlsx':
+            if not options['output']:
+                raise CommandError("--output is required for XLSX exports.")
+            try:
+                rows = write_xlsx(queryset, columns, options['output'], options['chunk_size'])
+            except RuntimeError as exc:
+                raise CommandError(exc)
+        else:
+            out = open(options['output'], 'w', newline='') if options['output'] else None
+            try:
+                rows = -1
+                for rows, line in enumerate(iter_csv(queryset, columns, options['chunk_size'])):
+                    if out:
+                        out.write(line)
+                    else:
+                        self.stdout.write(line, ending='')
+            finally:
+                if out:
+                    out.close()
+
+        self.stderr.write(f"Exported {rows} rows in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,39 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from core.importers import detect_format, import_leads
+
+
+class Command(BaseCommand):
+    help = "Bulk import leads from a CSV or JSON Lines file, skipping emails that already exist."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--source', help="Source stored on leads that have none.")
+        parser.add_argument('--errors', help="Error report path (defaults to <path>.errors.csv).")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        errors_path = options['errors'] or f"{path}.errors.csv"
+
+        def report(number, stats):
+            self.stdout.write(f"batch {number}: {stats}")
+
+        with open(path, encoding='utf-8-sig', newline='') as fileobj, \
+                open(errors_path, 'w', newline='') as errors_file:
+            total = import_leads(
+                fileobj,
+                fmt=fmt,
+                batch_size=options['batch_size'],
+                source=options['source'],
+                error_writer=csv.writer(errors_file),
+                on_batch=report,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {total}"))
+        if total.invalid:
+            self.stdout.write(self.style.WARNING(f"{total.invalid} rejected rows written to {errors_path}"))
@@ -0,0 +1,79 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from core.models import Client, SalesMade
+from core.reporting import rebuild_funnel
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent Client -> SalesMade conversions against the configured database. "
+        "Run it once per profile (e.g. CRM_DB_ENGINE=sqlite and CRM_DB_ENGINE=postgresql) to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--clients', type=int, default=400, help="Leads converted in total.")
+
+    def handle(self, *args, **options):
+        threads, total = options['threads'], options['clients']
+        tag = uuid.uuid4().hex[:8]
+        Client.objects.bulk_create([
+            Client(first_name='Load', last_name=str(i), email=f"loadtest-{tag}-{i}@example.com")
+            for i in range(total)
+        ], batch_size=1000)
+        pks = list(Client.objects.filter(email__startswith=f"loadtest-{tag}-").values_list('pk', flat=True))
+        try:
+            self._convert(threads, pks)
+        finally:
+            SalesMade.objects.filter(email__startswith=f"loadtest-{tag}-").delete()
+            Client.objects.filter(email__startswith=f"loadtest-{tag}-").delete()
+            # The conversions were counted into the funnel rollups; recount without them
+            rebuild_funnel()
+
+    def _convert(self, threads, pks):
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            try:
+                for pk in chunk:
+                    start = time.perf_counter()
+                    try:
+                        client = Client.objects.get(pk=pk)
+                        client.convert_to_sales_made()
+                    except Exception as exc:
+                        with lock:
+                            errors.append(exc)
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(pks[i::threads],)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        settings_dict = connections['default'].settings_dict
+        self.stdout.write(f"profile:     {connection.vendor} (CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, "
+                          f"pool={'pool' in settings_dict.get('OPTIONS', {})})")
+        self.stdout.write(f"threads:     {threads}")
+        self.stdout.write(f"conversions: {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s "
+                          f"({len(latencies) / elapsed:.0f}/s)")
+        if latencies:
+            latencies.sort()
+            self.stdout.write(f"latency:     p50 {statistics.median(latencies) * 1000:.1f}ms  "
+                              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms  "
+                              f"max {latencies[-1] * 1000:.1f}ms")
+        for message in sorted({str(exc) for exc in errors})[:5]:
+            self.stdout.write(self.style.ERROR(f"error:       {message}"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.payments import TOTAL_PAYMENTS_ID, get_total, invalidate_banner_totals, rebuild_rollups
+from core.models import TotalPayments
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily/monthly payment rollups from the Payment ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--fix-total',
+            action='store_true',
+            help="Overwrite the running total with the ledger total when they differ.",
+        )
+
+    def handle(self, *args, **options):
+        ledger_total = rebuild_rollups(batch_size=options['batch_size'])
+        invalidate_banner_totals()
+        running_total = get_total()
+        self.stdout.write(f"Ledger total:  {ledger_total}")
+        self.stdout.write(f"Running total: {running_total}")
+
+        if ledger_total == running_total:
+            self.stdout.write(self.style.SUCCESS("Rollups rebuilt; totals match."))
+        elif options['fix_total']:
+            TotalPayments.objects.update_or_create(id=TOTAL_PAYMENTS_ID, defaults={'total_amount': ledger_total})
+            self.stdout.write(self.style.WARNING(f"Running total reset to {ledger_total}."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                "Rollups rebuilt; running total differs from the ledger (use --fix-total to reset it)."
+            ))
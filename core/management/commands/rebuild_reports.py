@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.reporting import rebuild_funnel
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekly funnel/revenue rollups from the Client and Payment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows = rebuild_funnel(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Funnel rollups rebuilt: {rows} rows."))
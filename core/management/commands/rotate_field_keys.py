@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.crypto import current_key, reencrypt
+from core.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt encrypted Profile columns under the first of CRM_FIELD_KEYS, in short batches that don't lock "
+        "the table. Safe to stop and re-run; older keys can be removed from CRM_FIELD_KEYS once it finishes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--after', type=int, default=0, help="Resume after this Profile pk (printed per batch).")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Rotating to key {current_key().id}")
+
+        def report(last_pk, updated):
+            self.stdout.write(f"  up to Profile #{last_pk}: {updated} rows re-encrypted")
+
+        updated = reencrypt(Profile, options['batch_size'], options['after'], report)
+        self.stdout.write(self.style.SUCCESS(f"{updated} rows re-encrypted."))
@@ -0,0 +1,38 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker_main(poll_interval, once):
+    import django
+    django.setup()
+
+    from core.jobs import work
+    work(poll_interval=poll_interval, once=once)
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (admin bulk actions) in a pool of processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty.")
+
+    def handle(self, *args, **options):
+        # Children must open their own connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_worker_main, args=(options['poll_interval'], options['once']), daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} workers")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
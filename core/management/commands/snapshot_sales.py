@@ -0,0 +1,39 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.analytics import summarize
+from core.snapshots import FORMATS, SNAPSHOT_COLUMNS, default_format, write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Stream Client, SalesMade and Interaction rows into columnar snapshot files (Parquet or .npz)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', '-o', default='snapshots')
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to parquet when pyarrow is installed, else npz.")
+        parser.add_argument('--tables', help=f"Comma-separated subset of: {', '.join(SNAPSHOT_COLUMNS)}.")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--stats', action='store_true', help="Print revenue/conversion stats computed from the snapshots.")
+
+    def handle(self, *args, **options):
+        names = options['tables'].split(',') if options['tables'] else list(SNAPSHOT_COLUMNS)
+        unknown = set(names) - set(SNAPSHOT_COLUMNS)
+        if unknown:
+            raise CommandError(f"Unknown tables: {', '.join(sorted(unknown))}")
+
+        directory = Path(options['output_dir'])
+        directory.mkdir(parents=True, exist_ok=True)
+        try:
+            fmt = options['format'] or default_format()
+            for name in names:
+                start = time.perf_counter()
+                path, rows = write_snapshot(name, directory, fmt, options['chunk_size'])
+                self.stderr.write(f"{name}: {rows} rows -> {path} in {time.perf_counter() - start:.1f}s")
+
+            if options['stats']:
+                self.stdout.write(json.dumps(summarize(directory), indent=2))
+        except RuntimeError as exc:
+            raise CommandError(exc)
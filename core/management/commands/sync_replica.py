@@ -0,0 +1,37 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary into the SQLite files named in CRM_DB_REPLICAS, once or every --interval "
+        "seconds, standing in for replication (and its lag) when trying the replica router locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep copying, this many seconds apart.")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("sync_replica only copies SQLite files; use the server's replication otherwise.")
+        if not settings.CRM_DB_REPLICAS:
+            raise CommandError("No replicas configured; set CRM_DB_REPLICAS to one or more SQLite file names.")
+
+        while True:
+            start = time.perf_counter()
+            with closing(sqlite3.connect(primary['NAME'])) as source:
+                for alias in settings.CRM_DB_REPLICAS:
+                    # Online backup: a consistent snapshot, even while the primary is being written
+                    with closing(sqlite3.connect(settings.DATABASES[alias]['NAME'])) as target:
+                        source.backup(target)
+            self.stdout.write(f"Copied {primary['NAME']} to {len(settings.CRM_DB_REPLICAS)} replica(s) "
+                              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
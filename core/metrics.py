@@ -0,0 +1,205 @@
+import copy
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.db import connections
+
+# Samples kept per view, and views tracked; both bound the memory used
+SAMPLES_PER_VIEW = 1000
+MAX_VIEWS = 200
+QUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_samples = {}
+_totals = {}
+
+
+class RequestSample:
+    __slots__ = ('latency', 'sql_count', 'sql_time', 'template_time', 'status')
+
+    def __init__(self):
+        self.latency = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.status = 0
+
+
+class ViewTotals:
+    """Running totals for one view since start (or reset()); they only grow."""
+    __slots__ = ('count', 'latency', 'sql_count', 'sql_time', 'template_time', 'errors')
+
+    def __init__(self):
+        self.count = 0
+        self.latency = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.errors = 0
+
+    def add(self, sample):
+        self.count += 1
+        self.latency += sample.latency
+        self.sql_count += sample.sql_count
+        self.sql_time += sample.sql_time
+        self.template_time += sample.template_time
+        self.errors += sample.status >= 500
+
+
+# ---------------------------
+# Recording
+# ---------------------------
+def record(view, sample):
+    with _lock:
+        samples = _samples.get(view)
+        if samples is None:
+            if len(_samples) >= MAX_VIEWS:
+                view = 'other'
+                samples = _samples.setdefault(view, deque(maxlen=SAMPLES_PER_VIEW))
+            else:
+                samples = _samples[view] = deque(maxlen=SAMPLES_PER_VIEW)
+        samples.append(sample)
+        _totals.setdefault(view, ViewTotals()).add(sample)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+
+
+class QueryTimer:
+    """execute_wrapper that adds every query's count and time to a sample."""
+
+    def __init__(self, sample):
+        self.sample = sample
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sample.sql_count += 1
+            self.sample.sql_time += time.perf_counter() - start
+
+
+class PerformanceMiddleware:
+    """
+    Time every request: total latency, SQL count and time, and template
+    rendering time for TemplateResponses (all admin pages).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = RequestSample()
+        request._performance_sample = sample
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            timer = QueryTimer(sample)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        sample.latency = time.perf_counter() - start
+        sample.status = response.status_code
+
+        match = request.resolver_match
+        record(match.view_name if match else 'unresolved', sample)
+        return response
+
+    def process_template_response(self, request, response):
+        sample = getattr(request, '_performance_sample', None)
+        if sample is not None:
+            render = response.render
+
+            def timed_render():
+                start = time.perf_counter()
+                try:
+                    return render()
+                finally:
+                    sample.template_time += time.perf_counter() - start
+
+            response.render = timed_render
+        return response
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summary():
+    """
+    One row per view: latency quantiles over the recent samples, and
+    count/sums/errors as running totals, so they behave as counters.
+    """
+    with _lock:
+        snapshot = [
+            (view, [sample.latency for sample in samples], copy.copy(_totals[view]))
+            for view, samples in _samples.items()
+        ]
+
+    rows = []
+    for view, latencies, totals in snapshot:
+        latencies.sort()
+        rows.append({
+            'view': view,
+            'count': totals.count,
+            'latency_sum': totals.latency,
+            'quantiles': {q: _quantile(latencies, q) for q in QUANTILES},
+            'sql_count_sum': totals.sql_count,
+            'sql_time_sum': totals.sql_time,
+            'template_time_sum': totals.template_time,
+            'errors': totals.errors,
+        })
+    return rows
+
+
+def worst_offenders(limit=20):
+    rows = summary()
+    for row in rows:
+        row['p50'], row['p95'], row['p99'] = (row['quantiles'][q] for q in QUANTILES)
+        row['avg_sql_count'] = row['sql_count_sum'] / row['count']
+        row['avg_sql_time'] = row['sql_time_sum'] / row['count']
+        row['avg_template_time'] = row['template_time_sum'] / row['count']
+    return sorted(rows, key=lambda row: row['p95'], reverse=True)[:limit]
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """Render the summaries in the Prometheus text exposition format."""
+    lines = [
+        '# HELP crm_request_latency_seconds Request latency; quantiles over the last samples per view.',
+        '# TYPE crm_request_latency_seconds summary',
+    ]
+    rows = summary()
+    for row in rows:
+        view = _label(row['view'])
+        for q, value in row['quantiles'].items():
+            lines.append(f'crm_request_latency_seconds{{view="{view}",quantile="{q}"}} {value:.6f}')
+        lines.append(f'crm_request_latency_seconds_sum{{view="{view}"}} {row["latency_sum"]:.6f}')
+        lines.append(f'crm_request_latency_seconds_count{{view="{view}"}} {row["count"]}')
+
+    for name, key, help_text in (
+        ('crm_sql_queries_total', 'sql_count_sum', 'SQL queries run by requests.'),
+        ('crm_sql_seconds_total', 'sql_time_sum', 'Time spent in SQL by requests.'),
+        ('crm_template_seconds_total', 'template_time_sum', 'Template rendering time of requests.'),
+        ('crm_request_errors_total', 'errors', 'Requests that returned a 5xx status.'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for row in rows:
+            value = row[key]
+            lines.append(f'{name}{{view="{_label(row["view"])}"}} {value:.6f}' if isinstance(value, float)
+                         else f'{name}{{view="{_label(row["view"])}"}} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_payment_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['created_at', 'id'], name='client_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['status', 'created_at'], name='client_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['last_name', 'first_name'], name='client_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['phone'], name='client_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesmade',
+            index=models.Index(fields=['created_at', 'id'], name='salesmade_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesmade',
+            index=models.Index(fields=['last_name', 'first_name'], name='salesmade_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesmade',
+            index=models.Index(fields=['phone'], name='salesmade_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:28
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def week_of(day):
+    return day - timedelta(days=day.weekday())
+
+
+def build_funnel(apps, schema_editor):
+    """
+    Fill the new rollups from existing leads and payments, so the report
+    covers history and not only what happens after the upgrade. A frozen
+    copy of core.reporting.rebuild_funnel for the schema at this point
+    (state and payment_amount still live on Client).
+    """
+    Client = apps.get_model('core', 'Client')
+    Payment = apps.get_model('core', 'Payment')
+    FunnelWeeklyTotal = apps.get_model('core', 'FunnelWeeklyTotal')
+    totals = defaultdict(lambda: defaultdict(int))
+
+    leads = (Client.objects.order_by().annotate(day=TruncDate('created_at'))
+             .values('day', 'source', 'state').annotate(count=Count('id')))
+    for row in leads.iterator(chunk_size=2000):
+        totals[week_of(row['day']), row['source'] or '', row['state'] or '']['leads'] += row['count']
+
+    conversions = (Client.objects.filter(sales_made__isnull=False).order_by()
+                   .annotate(day=TruncDate(Coalesce('converted_at', 'created_at')))
+                   .values('day', 'source', 'state')
+                   .annotate(count=Count('id'), revenue=Sum('payment_amount')))
+    for row in conversions.iterator(chunk_size=2000):
+        bucket = totals[week_of(row['day']), row['source'] or '', row['state'] or '']
+        bucket['conversions'] += row['count']
+        bucket['booked_revenue'] += row['revenue'] or Decimal('0')
+
+    collected = (Payment.objects.order_by().annotate(
+        day=TruncDate('posted_at'),
+        lead_source=F('sales_made__client__source'),
+        lead_state=F('sales_made__client__state'),
+    ).values('day', 'lead_source', 'lead_state').annotate(amount=Sum('amount')))
+    for row in collected.iterator(chunk_size=2000):
+        totals[week_of(row['day']), row['lead_source'] or '', row['lead_state'] or '']['collected'] += row['amount']
+
+    FunnelWeeklyTotal.objects.bulk_create([
+        FunnelWeeklyTotal(week=week, source=source, state=state, **deltas)
+        for (week, source, state), deltas in totals.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='converted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='FunnelWeeklyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('source', models.CharField(blank=True, default='', max_length=100)),
+                ('state', models.CharField(blank=True, default='', max_length=50)),
+                ('leads', models.PositiveIntegerField(default=0)),
+                ('conversions', models.PositiveIntegerField(default=0)),
+                ('booked_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('collected', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('week', 'source', 'state'), name='funnel_week_source_state_uniq')],
+            },
+        ),
+        migrations.RunPython(build_funnel, migrations.RunPython.noop),
+    ]
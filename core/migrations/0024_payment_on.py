@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_funnel_reporting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='payment_on',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Payment date (parsed)'),
+        ),
+        migrations.AddField(
+            model_name='salesmade',
+            name='payment_on',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Payment date (parsed)'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['payment_on'], name='client_payment_on_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesmade',
+            index=models.Index(fields=['payment_on'], name='salesmade_payment_on_idx'),
+        ),
+    ]
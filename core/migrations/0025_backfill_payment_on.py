@@ -0,0 +1,67 @@
+import re
+from datetime import datetime
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Frozen copy of core.dates (parse_payment_date and backfill_payment_on) as
+# it was when payment_on was added, so later changes there don't change
+# what this migration does.
+PAYMENT_DATE_FORMATS = (
+    '%m-%d-%Y',
+    '%m/%d/%Y',
+    '%m/%d/%y',
+    '%m-%d-%y',
+    '%m.%d.%Y',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%B %d %Y',
+    '%b %d %Y',
+    '%d %B %Y',
+    '%d %b %Y',
+)
+
+
+def parse_payment_date(value):
+    if not value:
+        return None
+    text = re.sub(r'(?<=\d)(st|nd|rd|th)\b', '', value.strip(), flags=re.IGNORECASE)
+    if re.search('[A-Za-z]', text):
+        text = text.replace('.', ' ')
+    text = ' '.join(text.replace(',', ' ').split())
+    for fmt in PAYMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def backfill(apps, schema_editor):
+    # Unparsable dates are left empty; backfill_payment_dates lists them
+    for model_name in ('Client', 'SalesMade'):
+        model = apps.get_model('core', model_name)
+        pending = model.objects.filter(payment_on__isnull=True, payment_date__isnull=False).exclude(payment_date='')
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk).order_by('pk').only('pk', 'payment_date')[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for row in batch:
+                row.payment_on = parse_payment_date(row.payment_date)
+            model.objects.bulk_update([row for row in batch if row.payment_on], ['payment_on'])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own, so an interrupted run resumes where it stopped
+    atomic = False
+
+    dependencies = [
+        ('core', '0024_payment_on'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
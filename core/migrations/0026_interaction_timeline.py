@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_backfill_payment_on'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteractionArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('client_id', models.BigIntegerField(blank=True, null=True)),
+                ('sales_made_id', models.BigIntegerField(blank=True, null=True)),
+                ('date', models.DateTimeField()),
+                ('note_compressed', models.BinaryField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['client', 'date'], name='interaction_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['sales_made', 'date'], name='interaction_sales_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interactionarchive',
+            index=models.Index(fields=['client_id', 'date'], name='archive_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interactionarchive',
+            index=models.Index(fields=['sales_made_id', 'date'], name='archive_sales_date_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def share_interactions(apps, schema_editor):
+    # Notes (live and archived) of already converted leads take their sale, one UPDATE per table
+    Client = apps.get_model('core', 'Client')
+    Interaction = apps.get_model('core', 'Interaction')
+    InteractionArchive = apps.get_model('core', 'InteractionArchive')
+    lead_sale = Subquery(Client.objects.filter(pk=OuterRef('client_id')).values('sales_made_id')[:1])
+    Interaction.objects.filter(sales_made__isnull=True, client__sales_made__isnull=False).update(
+        sales_made_id=lead_sale
+    )
+    # Archived notes have no foreign keys to join through
+    InteractionArchive.objects.filter(
+        sales_made_id__isnull=True,
+        client_id__in=Client.objects.filter(sales_made__isnull=False).values('pk'),
+    ).update(sales_made_id=lead_sale)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_interaction_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(share_interactions, migrations.RunPython.noop),
+    ]
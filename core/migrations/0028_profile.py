@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_share_converted_interactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(blank=True, max_length=255, null=True)),
+                ('city', models.CharField(blank=True, max_length=100, null=True)),
+                ('state', models.CharField(blank=True, max_length=50, null=True)),
+                ('zip_code', models.CharField(blank=True, max_length=10, null=True)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('ssn_last4', models.CharField(blank=True, max_length=15, null=True, verbose_name='SSN (/Last 4)')),
+                ('mother_maiden_name', models.CharField(blank=True, max_length=20, null=True, verbose_name="Mother's Maiden Name")),
+                ('qualification_notes', models.TextField(blank=True, null=True)),
+                ('service_description', models.TextField(blank=True, null=True)),
+                ('payment_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('payment_date', models.CharField(blank=True, max_length=100, null=True)),
+                ('payment_on', models.DateField(blank=True, editable=False, null=True, verbose_name='Payment date (parsed)')),
+                ('cardholder_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('card_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('card_number', models.CharField(blank=True, max_length=19, null=True)),
+                ('card_expiration', models.CharField(blank=True, max_length=7, null=True)),
+                ('card_cvv', models.CharField(blank=True, max_length=3, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['payment_on'], name='profile_payment_on_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='profile',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='core.profile'),
+        ),
+        migrations.AddField(
+            model_name='salesmade',
+            name='profile',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='core.profile'),
+        ),
+    ]
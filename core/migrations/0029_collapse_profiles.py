@@ -0,0 +1,71 @@
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+# Columns as they were on Client/SalesMade when Profile was introduced
+PROFILE_FIELDS = (
+    'address', 'city', 'state', 'zip_code', 'date_of_birth', 'ssn_last4', 'mother_maiden_name',
+    'qualification_notes', 'service_description', 'payment_amount', 'payment_date', 'payment_on',
+    'cardholder_name', 'card_type', 'card_number', 'card_expiration', 'card_cvv',
+)
+
+
+def _values(row):
+    return {field: getattr(row, field) for field in PROFILE_FIELDS}
+
+
+def _batches(queryset):
+    """Rows still without a profile, ``BATCH_SIZE`` at a time, each batch in its own transaction."""
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.filter(pk__gt=last_pk, profile__isnull=True).order_by('pk')[:BATCH_SIZE])
+            if not batch:
+                return
+            last_pk = batch[-1].pk
+            yield batch
+
+
+def collapse_profiles(apps, schema_editor):
+    Client = apps.get_model('core', 'Client')
+    SalesMade = apps.get_model('core', 'SalesMade')
+    Profile = apps.get_model('core', 'Profile')
+
+    for batch in _batches(Client.objects.all()):
+        profiles = [Profile(**_values(client)) for client in batch]
+        Profile.objects.bulk_create(profiles)
+        for client, profile in zip(batch, profiles):
+            client.profile_id = profile.pk
+        Client.objects.bulk_update(batch, ['profile'])
+
+    for batch in _batches(SalesMade.objects.all()):
+        leads = {
+            client.sales_made_id: client
+            for client in Client.objects.filter(sales_made__in=batch).select_related('profile')
+        }
+        new_profiles = []
+        for sale in batch:
+            lead = leads.get(sale.pk)
+            if lead and lead.profile and _values(lead.profile) == _values(sale):
+                # Untouched copy made at conversion: point at the lead's row
+                sale.profile_id = lead.profile_id
+            else:
+                sale.profile = Profile(**_values(sale))
+                new_profiles.append(sale.profile)
+        Profile.objects.bulk_create(new_profiles)
+        for sale in batch:
+            sale.profile_id = sale.profile_id or sale.profile.pk
+        SalesMade.objects.bulk_update(batch, ['profile'])
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own, so an interrupted run resumes where it stopped
+    atomic = False
+
+    dependencies = [
+        ('core', '0028_profile'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_profiles, migrations.RunPython.noop),
+    ]
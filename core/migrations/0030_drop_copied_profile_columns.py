@@ -0,0 +1,157 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_collapse_profiles'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_payment_on_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='salesmade',
+            name='salesmade_payment_on_idx',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='address',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='card_cvv',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='card_expiration',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='card_number',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='card_type',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='cardholder_name',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='city',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='date_of_birth',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='mother_maiden_name',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='payment_amount',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='payment_date',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='payment_on',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='qualification_notes',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='service_description',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='ssn_last4',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='state',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='zip_code',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='address',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='card_cvv',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='card_expiration',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='card_number',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='card_type',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='cardholder_name',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='city',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='date_of_birth',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='mother_maiden_name',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='payment_amount',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='payment_date',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='payment_on',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='qualification_notes',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='service_description',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='ssn_last4',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='state',
+        ),
+        migrations.RemoveField(
+            model_name='salesmade',
+            name='zip_code',
+        ),
+    ]
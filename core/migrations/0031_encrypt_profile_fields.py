@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:48
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_drop_copied_profile_columns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='card_cvv',
+            field=core.fields.EncryptedCharField(blank=True, max_length=3, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='card_number',
+            field=core.fields.EncryptedCharField(blank=True, deterministic=True, max_length=19, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='mother_maiden_name',
+            field=core.fields.EncryptedCharField(blank=True, max_length=20, null=True, verbose_name="Mother's Maiden Name"),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='ssn_last4',
+            field=core.fields.EncryptedCharField(blank=True, deterministic=True, max_length=15, null=True, verbose_name='SSN (/Last 4)'),
+        ),
+    ]
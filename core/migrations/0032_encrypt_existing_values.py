@@ -0,0 +1,61 @@
+from django.db import migrations, models, transaction
+from django.db.models.expressions import ExpressionWrapper
+from django.db.models.lookups import Exact
+
+BATCH_SIZE = 500
+
+# Profile columns 0031 made encrypted, and how their stored tokens begin
+ENCRYPTED_FIELDS = ('card_cvv', 'card_number', 'mother_maiden_name', 'ssn_last4')
+TOKEN_PREFIX = 'enc1:'
+
+
+def _stored(name):
+    # The column as stored, skipping the field's decryption
+    return ExpressionWrapper(models.F(name), output_field=models.TextField())
+
+
+def encrypt_existing(apps, schema_editor):
+    """
+    Encrypt the plaintext left in the newly encrypted columns. Saving a
+    value through the field encrypts it; each UPDATE only applies while the
+    row still holds the plaintext that was read, so a concurrent edit
+    (already encrypted) is never overwritten. Finished rows are skipped,
+    so the migration can be re-run after an interruption.
+    """
+    Profile = apps.get_model('core', 'Profile')
+    plaintext = models.Q()
+    for name in ENCRYPTED_FIELDS:
+        plaintext |= models.Q(**{f'_stored_{name}__isnull': False}) & ~models.Q(
+            **{f'_stored_{name}': ''}) & ~models.Q(**{f'_stored_{name}__startswith': TOKEN_PREFIX})
+    pending = Profile.objects.annotate(**{f'_stored_{name}': _stored(name) for name in ENCRYPTED_FIELDS}).filter(plaintext)
+
+    last_pk = 0
+    while True:
+        batch = list(
+            pending.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', *(f'_stored_{name}' for name in ENCRYPTED_FIELDS))[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+        with transaction.atomic():
+            for pk, *stored in batch:
+                changes, unchanged = {}, [models.Q(pk=pk)]
+                for name, value in zip(ENCRYPTED_FIELDS, stored):
+                    if value and not value.startswith(TOKEN_PREFIX):
+                        changes[name] = value
+                        unchanged.append(Exact(_stored(name), value))
+                Profile.objects.filter(*unchanged).update(**changes)
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own, so an interrupted run resumes where it stopped
+    atomic = False
+
+    dependencies = [
+        ('core', '0031_encrypt_profile_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(encrypt_existing, migrations.RunPython.noop),
+    ]
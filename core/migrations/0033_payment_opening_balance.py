@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:59
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+TOTAL_PAYMENTS_ID = 1
+
+
+def seed_opening_balance(apps, schema_editor):
+    """
+    Post what the running total holds beyond the ledger as one opening-balance
+    payment, so ledger and running total agree on existing installs.
+    """
+    Payment = apps.get_model('core', 'Payment')
+    TotalPayments = apps.get_model('core', 'TotalPayments')
+    if Payment.objects.filter(opening_balance=True).exists():
+        return
+    total = TotalPayments.objects.filter(id=TOTAL_PAYMENTS_ID).values_list('total_amount', flat=True).first()
+    posted = Payment.objects.aggregate(total=Sum('amount'))['total'] or 0
+    if total and total != posted:
+        Payment.objects.create(amount=total - posted, posted_at=timezone.now(), opening_balance=True)
+
+
+def remove_opening_balance(apps, schema_editor):
+    apps.get_model('core', 'Payment').objects.filter(opening_balance=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_encrypt_existing_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='opening_balance',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=12),
+        ),
+        migrations.RunPython(seed_opening_balance, remove_opening_balance),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_payment_opening_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesListVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,16 +1,22 @@
-from django.db import models
+import zlib
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .dates import parse_payment_date
+from .fields import EncryptedCharField
 
 
 # ---------------------------
-# Completed Clients / Sales Made
+# Shared personal data
 # ---------------------------
-class SalesMade(models.Model):
-    first_name = models.CharField(max_length=50)
-    last_name = models.CharField(max_length=50)
-    email = models.EmailField(unique=True)
-    phone = models.CharField(max_length=20, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+class Profile(models.Model):
+    """
+    Address, identity, service and card details of one person.
 
+    A lead and the sale it converts into point at the same row, so
+    conversion copies no personal data.
+    """
     # Address info
     address = models.CharField(max_length=255, blank=True, null=True)
     city = models.CharField(max_length=100, blank=True, null=True)
@@ -19,35 +25,237 @@ class SalesMade(models.Model):
 
     # Personal info
     date_of_birth = models.DateField(blank=True, null=True)
-    ssn_last4 = models.CharField("SSN (/Last 4)", max_length=15, blank=True, null=True)
-    mother_maiden_name = models.CharField(verbose_name="Mother's Maiden Name", max_length=20, blank=True, null=True)
+    # Encrypted (core.fields); the SSN stays searchable by exact match
+    ssn_last4 = EncryptedCharField("SSN (/Last 4)", max_length=15, blank=True, null=True, deterministic=True)
+    mother_maiden_name = EncryptedCharField(verbose_name="Mother's Maiden Name", max_length=20, blank=True, null=True)
 
     # Notes & services
     qualification_notes = models.TextField(blank=True, null=True)
     service_description = models.TextField(blank=True, null=True)
     payment_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     payment_date = models.CharField(max_length=100, null=True, blank=True)
+    # Parsed from payment_date on save; indexed for date-range queries
+    payment_on = models.DateField("Payment date (parsed)", blank=True, null=True, editable=False)
 
-    # Payment card info (safe / last 4 only)
+    # Payment card info (safe / last 4 only); number and CVV are encrypted
     cardholder_name = models.CharField(max_length=100, blank=True, null=True)
     card_type = models.CharField(max_length=20, blank=True, null=True)
-    card_number = models.CharField(max_length=19, blank=True, null=True)
+    card_number = EncryptedCharField(max_length=19, blank=True, null=True, deterministic=True)
     card_expiration = models.CharField(max_length=7, blank=True, null=True)
-    card_cvv = models.CharField(max_length=3, blank=True, null=True)
+    card_cvv = EncryptedCharField(max_length=3, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_on'], name='profile_payment_on_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.payment_on = parse_payment_date(self.payment_date)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Profile #{self.pk}"
+
+
+# Profile columns exposed on Client and SalesMade as plain attributes
+PROFILE_FIELDS = tuple(
+    field.name for field in Profile._meta.concrete_fields if not field.primary_key
+)
+
+ENCRYPTED_PROFILE_FIELDS = tuple(
+    field.name for field in Profile._meta.concrete_fields if isinstance(field, EncryptedCharField)
+)
+
+
+def profile_lookup(model, name):
+    """ORM path to a column of ``model``, following ``profile`` for shared columns."""
+    if name in PROFILE_FIELDS and hasattr(model, 'profile'):
+        return f'profile__{name}'
+    return name
+
 
+def _profile_property(name):
+    def getter(self):
+        profile = self.profile
+        return getattr(profile, name) if profile is not None else None
+
+    def setter(self, value):
+        if self.profile is None:
+            self.profile = Profile()
+        setattr(self.profile, name, value)
+        self.profile._changed = True
+
+    return property(getter, setter)
+
+
+class ProfileOwnerQuerySet(models.QuerySet):
+
+    def with_profile(self):
+        """Join the profile, leaving out (and so never decrypting) its encrypted columns."""
+        return self.select_related('profile').defer(*(f'profile__{name}' for name in ENCRYPTED_PROFILE_FIELDS))
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False, **kwargs):
+        # Profiles created through the attributes are inserted first, in one batch
+        objs = list(objs)
+        profiles = [obj.profile for obj in objs if obj.has_unsaved_profile()]
+        for profile in profiles:
+            profile.payment_on = parse_payment_date(profile.payment_date)
+        Profile.objects.bulk_create(profiles, batch_size=batch_size)
+        for obj in objs:
+            if obj.has_cached_profile():
+                obj.profile = obj.profile
+        created = super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts, **kwargs)
+        if ignore_conflicts and profiles:
+            self._delete_dropped_profiles(objs, [profile.pk for profile in profiles])
+        return created
+
+    def _delete_dropped_profiles(self, objs, profile_ids, chunk_size=500):
+        """Remove the new profiles of rows the database skipped as conflicts."""
+        kept = set()
+        for start in range(0, len(profile_ids), chunk_size):
+            kept.update(self.model._base_manager.using(self.db).filter(
+                profile_id__in=profile_ids[start:start + chunk_size],
+            ).values_list('profile_id', flat=True))
+        dropped = set(profile_ids) - kept
+        if dropped:
+            Profile.objects.using(self.db).filter(pk__in=dropped).delete()
+            for obj in objs:
+                if obj.profile_id in dropped:
+                    obj.profile = None
+
+
+class ProfileOwnerMixin:
+    """
+    Reads and writes the PROFILE_FIELDS of ``profile`` as if they were
+    columns of this model, e.g. ``Client(state='TX')`` or ``client.city``.
+    Query them through ``profile__<name>`` (see profile_lookup).
+    """
+
+    def has_cached_profile(self):
+        return type(self).profile.field.is_cached(self) and self.profile is not None
+
+    def has_unsaved_profile(self):
+        return self.has_cached_profile() and self.profile.pk is None
+
+    def save(self, *args, **kwargs):
+        if self.has_cached_profile() and (self.profile.pk is None or getattr(self.profile, '_changed', False)):
+            self.profile.save()
+            self.profile._changed = False
+            self.profile = self.profile
+        super().save(*args, **kwargs)
+
+
+for _name in PROFILE_FIELDS:
+    setattr(ProfileOwnerMixin, _name, _profile_property(_name))
+
+
+# ---------------------------
+# Completed Clients / Sales Made
+# ---------------------------
+class SalesMade(ProfileOwnerMixin, models.Model):
+    first_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50)
+    email = models.EmailField(unique=True)
+    phone = models.CharField(max_length=20, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    profile = models.ForeignKey(Profile, on_delete=models.PROTECT, blank=True, null=True, editable=False)
+
+    objects = ProfileOwnerQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Sales Made"
         verbose_name_plural = "Sales Made"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='salesmade_created_idx'),
+            models.Index(fields=['last_name', 'first_name'], name='salesmade_name_idx'),
+            models.Index(fields=['phone'], name='salesmade_phone_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 
+# Columns copied from a prospective client onto its SalesMade row; the
+# personal data itself is shared through ``profile``
+SALES_MADE_COPY_FIELDS = (
+    'first_name',
+    'last_name',
+    'phone',
+    'profile_id',
+)
+
+
+class ClientManager(models.Manager.from_queryset(ProfileOwnerQuerySet)):
+
+    # ---------------------------
+    # Set-based conversion of many clients at once
+    # ---------------------------
+    def convert_many(self, queryset=None, batch_size=500, share_interactions=True):
+        """
+        Convert every active client in ``queryset`` to SalesMade.
+
+        Works in batches of ``batch_size``: one IN lookup for existing
+        SalesMade emails, one bulk_create for the missing ones (pointing at
+        the leads' profiles) and one bulk_update to link and flip the
+        clients, each batch in its own
+        transaction. With ``share_interactions`` the leads' notes are
+        re-pointed at their sales as well (see convert_to_sales_made).
+        Returns the number of clients converted.
+        """
+        from .reporting import record_conversions
+
+        if queryset is None:
+            queryset = self.get_queryset()
+        pks = list(queryset.filter(status='active').order_by('pk').values_list('pk', flat=True))
+
+        converted = 0
+        for start in range(0, len(pks), batch_size):
+            with transaction.atomic():
+                clients = list(
+                    self.filter(pk__in=pks[start:start + batch_size], status='active').select_related('profile')
+                )
+                emails = [client.email for client in clients]
+                existing = set(SalesMade.objects.filter(email__in=emails).values_list('email', flat=True))
+
+                SalesMade.objects.bulk_create([
+                    SalesMade(email=client.email, **client.sales_made_defaults())
+                    for client in clients
+                    if client.email not in existing
+                ], batch_size=batch_size)
+
+                # Re-read so the ids are known on every backend
+                sales_by_email = dict(SalesMade.objects.filter(email__in=emails).values_list('email', 'id'))
+                now = timezone.now()
+                for client in clients:
+                    client.sales_made_id = sales_by_email[client.email]
+                    client.status = 'converted'
+                    client.converted_at = now
+                self.bulk_update(clients, ['sales_made', 'status', 'converted_at'], batch_size=batch_size)
+                if share_interactions:
+                    # One UPDATE per table and batch: each note, live or archived, takes its lead's new sale
+                    lead_sale = models.Subquery(
+                        Client.objects.filter(pk=models.OuterRef('client_id')).values('sales_made_id')[:1]
+                    )
+                    Interaction.objects.filter(client__in=clients, sales_made__isnull=True).update(
+                        sales_made_id=lead_sale
+                    )
+                    InteractionArchive.objects.filter(
+                        client_id__in=[client.pk for client in clients], sales_made_id__isnull=True,
+                    ).update(sales_made_id=lead_sale)
+                record_conversions(clients)
+                converted += len(clients)
+
+        if converted:
+            # bulk_create/bulk_update don't send post_save
+            from .signals import mark_sales_list_changed
+            transaction.on_commit(mark_sales_list_changed)
+        return converted
+
+
 # ---------------------------
 # Prospective Clients
 # ---------------------------
-class Client(models.Model):
+class Client(ProfileOwnerMixin, models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
         ('converted', 'Converted'),
@@ -70,64 +278,60 @@ class Client(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     source = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-
-    # Address info
-    address = models.CharField(max_length=255, blank=True, null=True)
-    city = models.CharField(max_length=100, blank=True, null=True)
-    state = models.CharField(max_length=50, blank=True, null=True)
-    zip_code = models.CharField(max_length=10, blank=True, null=True)
-
-    # Personal info
-    date_of_birth = models.DateField(blank=True, null=True)
-    ssn_last4 = models.CharField("SSN (/Last 4)", max_length=9, blank=True, null=True)
-    mother_maiden_name = models.CharField(verbose_name="Mother's Maiden Name", max_length=20, blank=True, null=True)
-    # Notes & services
-    qualification_notes = models.TextField(blank=True, null=True)
-    service_description = models.TextField(blank=True, null=True)
-    payment_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
-    payment_date = models.CharField(max_length=100, null=True, blank=True)
-
-    # Payment card info (safe / last 4 only)
-    cardholder_name = models.CharField(max_length=100, blank=True, null=True)
-    card_type = models.CharField(max_length=20, blank=True, null=True)
-    card_number = models.CharField(max_length=19, blank=True, null=True)
-    card_expiration = models.CharField(max_length=7, blank=True, null=True)
-    card_cvv = models.CharField(max_length=3, blank=True, null=True)
+    profile = models.ForeignKey(Profile, on_delete=models.PROTECT, blank=True, null=True, editable=False)
 
     # Status
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    converted_at = models.DateTimeField(blank=True, null=True)
+
+    objects = ClientManager()
+
+    class Meta:
+        indexes = [
+            # The admin change list only ever shows active clients
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(status='active'),
+                name='client_active_created_idx',
+            ),
+            models.Index(fields=['status', 'created_at'], name='client_status_created_idx'),
+            models.Index(fields=['last_name', 'first_name'], name='client_name_idx'),
+            models.Index(fields=['phone'], name='client_phone_idx'),
+        ]
 
     # ---------------------------
     # Convert prospective client to completed sales
     # ---------------------------
-    def convert_to_sales_made(self):
+    def sales_made_defaults(self):
+        return {field: getattr(self, field) for field in SALES_MADE_COPY_FIELDS}
+
+    def convert_to_sales_made(self, share_interactions=True):
+        """
+        Create (or find) this lead's SalesMade and link it. A new sale
+        shares the lead's Profile, so no personal data is copied.
+
+        With ``share_interactions`` the lead's notes also get the new
+        ``sales_made`` in one UPDATE instead of being copied, so both
+        change forms show the same history (Interaction.objects.timeline);
+        archived notes get it too, so the older pages of the timeline match.
+        """
+        from .reporting import record_conversions
+
         sales_client, _ = SalesMade.objects.get_or_create(
             email=self.email,
-            defaults={
-                'first_name': self.first_name,
-                'last_name': self.last_name,
-                'phone': self.phone,
-                'address': self.address,
-                'city': self.city,
-                'state': self.state,
-                'zip_code': self.zip_code,
-                'date_of_birth': self.date_of_birth,
-                'ssn_last4': self.ssn_last4,
-                'mother_maiden_name': self.mother_maiden_name,
-                'qualification_notes': self.qualification_notes,
-                'service_description': self.service_description,
-                'payment_amount': self.payment_amount,
-                'payment_date': self.payment_date,
-                'cardholder_name': self.cardholder_name,
-                'card_type': self.card_type,
-                'card_number': self.card_number,
-                'card_expiration': self.card_expiration,
-                'card_cvv': self.card_cvv,
-            }
+            defaults=self.sales_made_defaults(),
         )
         self.sales_made = sales_client
         self.status = 'converted'
-        self.save()
+        self.converted_at = timezone.now()
+        with transaction.atomic():
+            self.save()
+            if share_interactions:
+                Interaction.objects.filter(client=self, sales_made__isnull=True).update(sales_made=sales_client)
+                InteractionArchive.objects.filter(client_id=self.pk, sales_made_id__isnull=True).update(
+                    sales_made_id=sales_client.pk
+                )
+            record_conversions([self])
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.status})"
@@ -136,6 +340,21 @@ class Client(models.Model):
 # ---------------------------
 # Interactions
 # ---------------------------
+class InteractionQuerySet(models.QuerySet):
+
+    def timeline(self, client_id=None, sales_made_id=None):
+        """
+        Every note for a lead and/or its sale, newest first.
+
+        A converted lead shares its notes with its sale, so whenever a
+        ``sales_made_id`` is known the (sales_made, date) index alone
+        serves both sides; otherwise the (client, date) index is used.
+        """
+        if sales_made_id:
+            return self.filter(sales_made_id=sales_made_id).order_by('-date', '-id')
+        return self.filter(client_id=client_id).order_by('-date', '-id')
+
+
 class Interaction(models.Model):
     client = models.ForeignKey(
         Client,
@@ -154,13 +373,188 @@ class Interaction(models.Model):
     note = models.TextField()
     date = models.DateTimeField(auto_now_add=True)
 
+    objects = InteractionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Timelines are read per owner, newest first
+            models.Index(fields=['client', 'date'], name='interaction_client_date_idx'),
+            models.Index(fields=['sales_made', 'date'], name='interaction_sales_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.client_id and not self.sales_made_id:
+            # Notes added to a converted lead belong to its sale too
+            self.sales_made_id = self.client.sales_made_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.date.strftime('%Y-%m-%d')} - {self.note[:30]}"
 
 
+class InteractionArchive(models.Model):
+    """
+    Interactions older than the archive cutoff (see core.timeline).
+
+    Keeps the original id and owner ids without foreign keys, and the note
+    zlib-compressed, so the live table and its indexes stay small.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    client_id = models.BigIntegerField(blank=True, null=True)
+    sales_made_id = models.BigIntegerField(blank=True, null=True)
+    date = models.DateTimeField()
+    note_compressed = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client_id', 'date'], name='archive_client_date_idx'),
+            models.Index(fields=['sales_made_id', 'date'], name='archive_sales_date_idx'),
+        ]
+
+    @property
+    def note(self):
+        return zlib.decompress(self.note_compressed).decode()
+
+    def __str__(self):
+        return f"{self.date.strftime('%Y-%m-%d')} - {self.note[:30]} (archived)"
+
+
+# ---------------------------
+# Public sales list version
+# ---------------------------
+class SalesListVersion(models.Model):
+    """
+    Single row: when the public sales list last changed. It lives in the
+    database so that every worker agrees on the cached page's version.
+    """
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Sales list changed at {self.changed_at}"
+
+
 class TotalPayments(models.Model):
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
     def __str__(self):
         return f"Total: {self.total_amount}"
 
+
+
+# ---------------------------
+# Payment ledger
+# ---------------------------
+class Payment(models.Model):
+    """One row per payment posting. Rows are never updated or deleted."""
+    sales_made = models.ForeignKey(
+        SalesMade,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payments'
+    )
+    # As wide as TotalPayments.total_amount: the opening balance carries a whole running total
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    posted_at = models.DateTimeField(default=timezone.now)
+    # The running total collected before the ledger existed (one row, seeded
+    # by migration 0033); it counts towards the ledger total but not the rollups
+    opening_balance = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sales_made', 'posted_at'], name='payment_sale_posted_idx'),
+            models.Index(fields=['posted_at'], name='payment_posted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.posted_at.strftime('%Y-%m-%d')} - {self.amount}"
+
+
+class PaymentDailyTotal(models.Model):
+    day = models.DateField(unique=True)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.total_amount}"
+
+
+class PaymentMonthlyTotal(models.Model):
+    # First day of the month
+    month = models.DateField(unique=True)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.month.strftime('%Y-%m')}: {self.total_amount}"
+
+
+# ---------------------------
+# Background jobs
+# ---------------------------
+class Job(models.Model):
+    KIND_CHOICES = [
+        ('convert_clients', 'Convert clients to Sales Made'),
+        ('add_payments', 'Add payments to total'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    # Primary keys to process, in order; ``processed`` is how many are done
+    object_ids = models.JSONField(default=list)
+    processed = models.PositiveIntegerField(default=0)
+    chunk_size = models.PositiveIntegerField(default=500)
+    requested_by = models.CharField(max_length=150, blank=True)
+    # Lease held by the worker running the job; a stale lease can be taken over
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    @property
+    def total(self):
+        return len(self.object_ids)
+
+    @property
+    def progress(self):
+        return int(self.processed * 100 / self.total) if self.total else 100
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
+# ---------------------------
+# Reporting rollups
+# ---------------------------
+class FunnelWeeklyTotal(models.Model):
+    """Lead funnel and revenue per (week, source, state), kept current by core.reporting."""
+    # Monday of the week
+    week = models.DateField()
+    source = models.CharField(max_length=100, blank=True, default='')
+    state = models.CharField(max_length=50, blank=True, default='')
+    leads = models.PositiveIntegerField(default=0)
+    conversions = models.PositiveIntegerField(default=0)
+    # payment_amount of the leads converted that week
+    booked_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Payments posted that week
+    collected = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['week', 'source', 'state'], name='funnel_week_source_state_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.week} {self.source or '-'} {self.state or '-'}"
@@ -0,0 +1,132 @@
+import hashlib
+from datetime import datetime
+
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import crm_cache
+
+# Query-string parameter carrying the (created_at, id) of the last row shown
+CURSOR_VAR = 'cursor'
+
+COUNT_CACHE_TIMEOUT = 30
+
+
+# ---------------------------
+# Keyset (seek) pagination on (created_at, id)
+# ---------------------------
+def encode_cursor(obj, field='created_at'):
+    return f"{getattr(obj, field).isoformat()}_{obj.pk}"
+
+
+def decode_cursor(cursor):
+    """Return ``(timestamp, pk)`` or None for a missing/garbled cursor."""
+    try:
+        timestamp, pk = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_queryset(queryset, cursor=None, field='created_at'):
+    """
+    Rows after ``cursor``, newest first.
+
+    Rows are sought with a range on the (``field``, id) index rather
+    than skipped with OFFSET, so every page costs the same.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        timestamp, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lte': timestamp}),
+            Q(**{f'{field}__lt': timestamp}) | Q(pk__lt=pk),
+        )
+    return queryset
+
+
+def keyset_page(queryset, cursor=None, per_page=50, field='created_at'):
+    """Return ``(rows, next_cursor)``; ``next_cursor`` is None on the last page."""
+    rows = list(keyset_queryset(queryset, cursor, field)[:per_page + 1])
+    return _split_page(rows, per_page, field)
+
+
+async def akeyset_page(queryset, cursor=None, per_page=50):
+    rows = [row async for row in keyset_queryset(queryset, cursor)[:per_page + 1]]
+    return _split_page(rows, per_page)
+
+
+def _split_page(rows, per_page, field='created_at'):
+    next_cursor = encode_cursor(rows[per_page - 1], field) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+# ---------------------------
+# Cached counts
+# ---------------------------
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """COUNT(*) for ``queryset``, reused for ``timeout`` seconds."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'core:count:' + hashlib.md5(f"{sql}|{params}".encode()).hexdigest()
+    count = crm_cache.get(key)
+    if count is None:
+        count = queryset.count()
+        crm_cache.set(key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+# ---------------------------
+# Admin change list
+# ---------------------------
+class KeysetChangeList(ChangeList):
+    """
+    Change list that pages with a ``cursor`` parameter instead of ``p``.
+
+    Falls back to the stock numbered pages when the user sorts by a
+    column, since the cursor only follows the default ordering.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        self.keyset = ORDER_VAR not in self.params
+        if not self.keyset:
+            return super().get_results(request)
+
+        self.cursor = self.params.get(CURSOR_VAR)
+        self.result_list, self.next_cursor = keyset_page(self.queryset, self.cursor, self.list_per_page)
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+
+    @property
+    def first_page_url(self):
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+    @property
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+
+class KeysetPaginationMixin:
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .cache import crm_cache
+from .models import Payment, PaymentDailyTotal, PaymentMonthlyTotal, TotalPayments
+from .reporting import record_collected
+from .rollups import increment
+from .signals import mark_sales_list_changed
+
+# The running total lives in a single well-known row
+TOTAL_PAYMENTS_ID = 1
+
+# The change-list banner is cached and dropped whenever a payment commits
+BANNER_CACHE_KEY = 'core:payment-banner'
+BANNER_CACHE_TIMEOUT = 60
+
+
+# ---------------------------
+# Running total
+# ---------------------------
+def add_to_total(amount):
+    """
+    Atomically add ``amount`` to the running total.
+
+    The increment is applied by the database (UPDATE ... SET total_amount =
+    total_amount + %s), so concurrent posts never read-modify-write the
+    same value in Python and no payment can be lost.
+    """
+    if not amount:
+        return
+    increment(TotalPayments, {'id': TOTAL_PAYMENTS_ID}, total_amount=amount)
+    transaction.on_commit(invalidate_banner_totals)
+    # UPDATE ... SET doesn't send post_save
+    transaction.on_commit(mark_sales_list_changed)
+
+
+def get_total():
+    total = TotalPayments.objects.filter(id=TOTAL_PAYMENTS_ID).values_list('total_amount', flat=True).first()
+    return total if total is not None else Decimal('0.00')
+
+
+async def aget_total():
+    total = await TotalPayments.objects.filter(id=TOTAL_PAYMENTS_ID).values_list('total_amount', flat=True).afirst()
+    return total if total is not None else Decimal('0.00')
+
+
+# ---------------------------
+# Cached banner totals
+# ---------------------------
+def get_banner_totals():
+    totals = crm_cache.get(BANNER_CACHE_KEY)
+    if totals is None:
+        totals = {'total': get_total(), 'month': get_month_total()}
+        crm_cache.set(BANNER_CACHE_KEY, totals, BANNER_CACHE_TIMEOUT)
+    return totals
+
+
+def invalidate_banner_totals():
+    crm_cache.delete(BANNER_CACHE_KEY)
+
+
+# ---------------------------
+# Ledger postings
+# ---------------------------
+def record_payments(postings, posted_at=None):
+    """
+    Append one Payment per ``(sales_made, amount)`` pair and fold the
+    amounts into the daily/monthly rollups and the running total.
+
+    Postings without an amount are skipped. Returns the created payments.
+    """
+    posted_at = posted_at or timezone.now()
+    payments = [
+        Payment(sales_made=sales_made, amount=amount, posted_at=posted_at)
+        for sales_made, amount in postings
+        if amount
+    ]
+    if not payments:
+        return []
+
+    amount = sum(payment.amount for payment in payments)
+    day = timezone.localdate(posted_at)
+    with transaction.atomic():
+        Payment.objects.bulk_create(payments)
+        increment(PaymentDailyTotal, {'day': day}, total_amount=amount, payment_count=len(payments))
+        increment(PaymentMonthlyTotal, {'month': day.replace(day=1)}, total_amount=amount, payment_count=len(payments))
+        add_to_total(amount)
+        record_collected(payments)
+    return payments
+
+
+def record_payment(amount, sales_made=None, posted_at=None):
+    payments = record_payments([(sales_made, amount)], posted_at=posted_at)
+    return payments[0] if payments else None
+
+
+def get_month_total(day=None):
+    month = (day or timezone.localdate()).replace(day=1)
+    total = PaymentMonthlyTotal.objects.filter(month=month).values_list('total_amount', flat=True).first()
+    return total if total is not None else Decimal('0.00')
+
+
+# ---------------------------
+# Rollup rebuild
+# ---------------------------
+def rebuild_rollups(batch_size=2000):
+    """
+    Recompute the daily and monthly rollups from the ledger.
+
+    The ledger is streamed ``batch_size`` rows at a time so memory only
+    grows with the number of distinct days. Returns the ledger total,
+    which includes the opening balance the rollups leave out.
+    """
+    daily = defaultdict(lambda: [Decimal('0.00'), 0])
+    ledger = Payment.objects.filter(opening_balance=False).order_by().values_list('posted_at', 'amount')
+    for posted_at, amount in ledger.iterator(chunk_size=batch_size):
+        bucket = daily[timezone.localdate(posted_at)]
+        bucket[0] += amount
+        bucket[1] += 1
+
+    monthly = defaultdict(lambda: [Decimal('0.00'), 0])
+    for day, (amount, count) in daily.items():
+        bucket = monthly[day.replace(day=1)]
+        bucket[0] += amount
+        bucket[1] += count
+
+    with transaction.atomic():
+        PaymentDailyTotal.objects.all().delete()
+        PaymentDailyTotal.objects.bulk_create([
+            PaymentDailyTotal(day=day, total_amount=amount, payment_count=count)
+            for day, (amount, count) in daily.items()
+        ], batch_size=batch_size)
+        PaymentMonthlyTotal.objects.all().delete()
+        PaymentMonthlyTotal.objects.bulk_create([
+            PaymentMonthlyTotal(month=month, total_amount=amount, payment_count=count)
+            for month, (amount, count) in monthly.items()
+        ], batch_size=batch_size)
+
+    opening = Payment.objects.filter(opening_balance=True).aggregate(total=Sum('amount'))['total']
+    return sum((amount for amount, _ in monthly.values()), opening or Decimal('0.00'))
@@ -0,0 +1,132 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Client, FunnelWeeklyTotal, Payment
+from .rollups import increment
+
+DIMENSIONS = ('week', 'source', 'state')
+
+
+def week_of(value):
+    """Monday of the (local) week containing a datetime or date."""
+    day = timezone.localdate(value) if hasattr(value, 'hour') else value
+    return day - timedelta(days=day.weekday())
+
+
+def _key(week, source, state):
+    return {'week': week, 'source': source or '', 'state': state or ''}
+
+
+def _apply(totals):
+    with transaction.atomic():
+        for (week, source, state), deltas in totals.items():
+            increment(FunnelWeeklyTotal, _key(week, source, state),
+                      **{name: value for name, value in deltas.items() if value})
+
+
+# ---------------------------
+# Incremental updates (called from the write paths)
+# ---------------------------
+def record_leads(clients):
+    totals = defaultdict(lambda: defaultdict(int))
+    for client in clients:
+        totals[week_of(client.created_at or timezone.now()), client.source, client.state]['leads'] += 1
+    _apply(totals)
+
+
+def record_conversions(clients):
+    totals = defaultdict(lambda: defaultdict(int))
+    for client in clients:
+        bucket = totals[week_of(client.converted_at or timezone.now()), client.source, client.state]
+        bucket['conversions'] += 1
+        bucket['booked_revenue'] += client.payment_amount or Decimal('0')
+    _apply(totals)
+
+
+def record_collected(payments):
+    sale_ids = {payment.sales_made_id for payment in payments if payment.sales_made_id}
+    leads = {
+        sale_id: (source, state)
+        for sale_id, source, state in Client.objects.filter(sales_made__in=sale_ids).values_list(
+            'sales_made_id', 'source', 'profile__state')
+    }
+    totals = defaultdict(lambda: defaultdict(int))
+    for payment in payments:
+        source, state = leads.get(payment.sales_made_id, ('', ''))
+        totals[week_of(payment.posted_at), source, state]['collected'] += payment.amount
+    _apply(totals)
+
+
+# ---------------------------
+# Rebuild
+# ---------------------------
+def rebuild_funnel(batch_size=2000):
+    """
+    Recompute every FunnelWeeklyTotal row from Client and Payment.
+
+    Rows are grouped per day in the database and folded into weeks here,
+    so only one row per (day, source, state) is held in memory.
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+
+    leads = (Client.objects.order_by().annotate(day=TruncDate('created_at'))
+             .values('day', 'source', 'profile__state').annotate(count=Count('id')))
+    for row in leads.iterator(chunk_size=batch_size):
+        totals[week_of(row['day']), row['source'] or '', row['profile__state'] or '']['leads'] += row['count']
+
+    conversions = (Client.objects.filter(sales_made__isnull=False).order_by()
+                   .annotate(day=TruncDate(Coalesce('converted_at', 'created_at')))
+                   .values('day', 'source', 'profile__state')
+                   .annotate(count=Count('id'), revenue=Sum('profile__payment_amount')))
+    for row in conversions.iterator(chunk_size=batch_size):
+        bucket = totals[week_of(row['day']), row['source'] or '', row['profile__state'] or '']
+        bucket['conversions'] += row['count']
+        bucket['booked_revenue'] += row['revenue'] or Decimal('0')
+
+    collected = (Payment.objects.filter(opening_balance=False).order_by().annotate(
+        day=TruncDate('posted_at'),
+        lead_source=F('sales_made__client__source'),
+        lead_state=F('sales_made__client__profile__state'),
+    ).values('day', 'lead_source', 'lead_state').annotate(amount=Sum('amount')))
+    for row in collected.iterator(chunk_size=batch_size):
+        totals[week_of(row['day']), row['lead_source'] or '', row['lead_state'] or '']['collected'] += row['amount']
+
+    with transaction.atomic():
+        FunnelWeeklyTotal.objects.all().delete()
+        FunnelWeeklyTotal.objects.bulk_create([
+            FunnelWeeklyTotal(**_key(week, source, state), **deltas)
+            for (week, source, state), deltas in totals.items()
+        ], batch_size=batch_size)
+    return len(totals)
+
+
+# ---------------------------
+# Reads (rollups only)
+# ---------------------------
+def funnel(group_by='source', since=None, until=None):
+    """Funnel rows grouped by one dimension, read from the weekly rollups."""
+    if group_by not in DIMENSIONS:
+        raise ValueError(f"group_by must be one of {', '.join(DIMENSIONS)}")
+    queryset = FunnelWeeklyTotal.objects.all()
+    if since:
+        queryset = queryset.filter(week__gte=week_of(since))
+    if until:
+        queryset = queryset.filter(week__lte=until)
+    rows = (queryset.values(group_by)
+            .annotate(leads=Sum('leads'), conversions=Sum('conversions'),
+                      booked_revenue=Sum('booked_revenue'), collected=Sum('collected'))
+            .order_by(group_by))
+    return [{
+        group_by: row[group_by].isoformat() if group_by == 'week' else (row[group_by] or 'unknown'),
+        'leads': row['leads'],
+        'conversions': row['conversions'],
+        'conversion_rate': round(row['conversions'] / row['leads'], 4) if row['leads'] else None,
+        'booked_revenue': f"{row['booked_revenue']:.2f}",
+        'collected': f"{row['collected']:.2f}",
+    } for row in rows]
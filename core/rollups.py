@@ -0,0 +1,20 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def increment(model, lookup, **deltas):
+    """
+    Add ``deltas`` to the row matching ``lookup`` with a single UPDATE,
+    creating the row when it does not exist yet.
+
+    The addition happens in the database, so concurrent writers never
+    overwrite each other's increments.
+    """
+    changes = {name: F(name) + value for name, value in deltas.items()}
+    if not model.objects.filter(**lookup).update(**changes):
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **deltas)
+        except IntegrityError:
+            # Another request created the row first; fall back to the increment
+            model.objects.filter(**lookup).update(**changes)
@@ -0,0 +1,109 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Reads of this app's models may go to a replica; everything else stays on the primary
+REPLICATED_APPS = frozenset({'core'})
+
+# Session key: until when this session's reads stay on the primary
+STICKY_SESSION_KEY = '_crm_primary_until'
+
+_use_primary = ContextVar('crm_use_primary', default=False)
+_replica = ContextVar('crm_replica', default=None)
+
+
+def recently_written(timestamp):
+    """True if a write at ``timestamp`` may not have reached the replicas yet."""
+    return timestamp is not None and time.time() - timestamp < settings.CRM_DB_STICKY_SECONDS
+
+
+@contextmanager
+def use_primary(enabled=True):
+    """Send reads in this block (and this context) to the primary."""
+    token = _use_primary.set(_use_primary.get() or enabled)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+@contextmanager
+def pin_replica():
+    """Read from one replica, picked at random, for this block (and this context)."""
+    replicas = settings.CRM_DB_REPLICAS
+    token = _replica.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+# ---------------------------
+# Router
+# ---------------------------
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary; reads of core models go to one of
+    CRM_DB_REPLICAS, except inside a transaction on the primary or a
+    use_primary() block, where they must see what was just written, and
+    from data migrations (historical models), which run ahead of the replicas.
+
+    All reads in one context use the same replica, so replicas lagging by
+    different amounts never make rows go backwards within a request.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.CRM_DB_REPLICAS
+        if not replicas or model._meta.app_label not in REPLICATED_APPS:
+            return None
+        if _use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block or model._meta.apps is not apps:
+            return DEFAULT_DB_ALIAS
+        replica = _replica.get()
+        if replica not in replicas:
+            # Outside pin_replica(): pick one for the rest of this context
+            replica = random.choice(replicas)
+            _replica.set(replica)
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in settings.CRM_DB_REPLICAS
+
+
+# ---------------------------
+# Read-your-writes
+# ---------------------------
+class ReplicaStickinessMiddleware:
+    """
+    Pin a session's reads to the primary for CRM_DB_STICKY_SECONDS after
+    it sends a POST (or any unsafe method), so the redirect that follows
+    shows the change even while the replicas lag. The unsafe request
+    itself reads from the primary throughout.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = getattr(request, 'session', None)
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        sticky_until = session.get(STICKY_SESSION_KEY) if session is not None else None
+        with pin_replica(), use_primary(unsafe or (sticky_until is not None and sticky_until > time.time())):
+            response = self.get_response(request)
+        if unsafe and session is not None and settings.CRM_DB_REPLICAS:
+            session[STICKY_SESSION_KEY] = time.time() + settings.CRM_DB_STICKY_SECONDS
+        elif sticky_until is not None and sticky_until <= time.time():
+            del session[STICKY_SESSION_KEY]
+        return response
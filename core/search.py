@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# Columns covered by the search index, matching the admins' search_fields
+SEARCH_COLUMNS = ('first_name', 'last_name', 'email', 'phone')
+SEARCH_TABLES = ('core_client', 'core_salesmade')
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class DefaultSearchBackend:
+    """Leave searching to the admin's icontains lookups."""
+
+    def search(self, queryset, search_term):
+        return None
+
+
+class SQLiteFTSSearchBackend:
+    """
+    Match against the FTS5 trigram tables kept in sync by triggers.
+
+    The trigram tokenizer matches case-insensitive substrings, so results
+    are the same as the admin's icontains search, but served by an index.
+    Terms shorter than three characters can't be matched by trigrams and
+    fall back to the default search.
+    """
+
+    def search(self, queryset, search_term):
+        terms = search_term.split()
+        if not terms or any(len(term) < 3 for term in terms):
+            return None
+        table = f"{queryset.model._meta.db_table}_fts"
+        match = ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match]))
+
+
+def get_search_backend():
+    path = getattr(settings, 'CRM_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSSearchBackend()
+    # PostgreSQL keeps the icontains lookups; the pg_trgm indexes serve them.
+    return DefaultSearchBackend()
+
+
+# ---------------------------
+# Index installation
+# ---------------------------
+def _sqlite_fts_sql(table):
+    fts = f"{table}_fts"
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f"old.{column}" for column in SEARCH_COLUMNS)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+            USING fts5({columns}, content='{table}', content_rowid='id', tokenize='trigram')""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+    ]
+
+
+def _postgresql_trigram_sql(table):
+    return [
+        f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        for column in SEARCH_COLUMNS
+    ]
+
+
+def install_search_index(using='default'):
+    """
+    Create the search tables/indexes and their sync triggers if missing.
+
+    Safe to run repeatedly. It runs after every migrate because SQLite
+    drops triggers whenever a migration rebuilds core_client or
+    core_salesmade.
+    """
+    db = connections[using]
+    with db.cursor() as cursor:
+        tables = db.introspection.table_names(cursor)
+        if not all(table in tables for table in SEARCH_TABLES):
+            return
+        if db.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table in SEARCH_TABLES:
+            if db.vendor == 'sqlite':
+                created = f"{table}_fts" not in tables
+                for statement in _sqlite_fts_sql(table):
+                    cursor.execute(statement)
+                if created:
+                    cursor.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+            elif db.vendor == 'postgresql':
+                for statement in _postgresql_trigram_sql(table):
+                    cursor.execute(statement)
+
+
+def install_search_index_after_migrate(sender, using='default', **kwargs):
+    install_search_index(using)
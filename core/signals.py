@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Client, Profile, SalesListVersion, SalesMade, TotalPayments
+from .reporting import record_leads
+from .routers import use_primary
+
+# The version lives in a single well-known row
+SALES_LIST_VERSION_ID = 1
+
+
+# ---------------------------
+# Public sales list cache
+# ---------------------------
+def sales_list_changed_at():
+    """Timestamp of the last change that affects the public sales list."""
+    with use_primary():
+        changed_at = SalesListVersion.objects.filter(pk=SALES_LIST_VERSION_ID).values_list('changed_at', flat=True).first()
+    if changed_at is None:
+        # Never set: start the first version
+        return mark_sales_list_changed()
+    return changed_at.timestamp()
+
+
+def mark_sales_list_changed():
+    changed_at = timezone.now()
+    if not SalesListVersion.objects.filter(pk=SALES_LIST_VERSION_ID).update(changed_at=changed_at):
+        SalesListVersion.objects.get_or_create(pk=SALES_LIST_VERSION_ID, defaults={'changed_at': changed_at})
+    return changed_at.timestamp()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=SalesMade)
+@receiver(post_save, sender=TotalPayments)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=SalesMade)
+def invalidate_sales_list(sender, **kwargs):
+    # After commit, so the version row isn't locked for the whole write
+    # and a new version never points at uncommitted rows
+    transaction.on_commit(mark_sales_list_changed)
+
+
+# ---------------------------
+# Reporting rollups
+# ---------------------------
+@receiver(post_save, sender=Client)
+def count_new_lead(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_leads([instance])
+
+
+# ---------------------------
+# Shared profiles
+# ---------------------------
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=SalesMade)
+def delete_orphaned_profile(sender, instance, **kwargs):
+    # A lead and its sale share one profile; drop it with the last of them
+    profile_id = instance.profile_id
+    if profile_id and not (
+        Client.objects.filter(profile_id=profile_id).exists() or SalesMade.objects.filter(profile_id=profile_id).exists()
+    ):
+        Profile.objects.filter(pk=profile_id).delete()
@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+logger = logging.getLogger('core.slow_queries')
+
+# Parameters bound to these columns never reach the log
+SENSITIVE_COLUMNS = frozenset({'card_number', 'card_cvv', 'ssn_last4', 'mother_maiden_name'})
+REDACTED = '[redacted]'
+
+_INSERT_COLUMNS = re.compile(r'^\s*INSERT\s+INTO\s+\S+\s*\((.*?)\)\s*VALUES', re.IGNORECASE | re.DOTALL)
+_IDENTIFIER = re.compile(r'"?([A-Za-z_][A-Za-z0-9_]*)"?')
+_LAST_IDENTIFIER = re.compile(r'"([A-Za-z_][A-Za-z0-9_]*)"(?![\s\S]*")')
+
+_state = threading.local()
+
+
+# ---------------------------
+# Redaction
+# ---------------------------
+def _placeholder_columns(sql, count):
+    """Best guess at the column each ``%s`` is compared with or assigned to."""
+    insert = _INSERT_COLUMNS.match(sql)
+    if insert:
+        columns = [match.group(1) for match in _IDENTIFIER.finditer(insert.group(1))]
+        return [columns[i % len(columns)] if columns else None for i in range(count)]
+
+    columns = []
+    position = 0
+    for _ in range(count):
+        index = sql.find('%s', position)
+        if index < 0:
+            break
+        last = _LAST_IDENTIFIER.search(sql[max(0, index - 200):index])
+        columns.append(last.group(1) if last else None)
+        position = index + 2
+    return columns
+
+
+def redact_params(sql, params):
+    if not params:
+        return params
+    if isinstance(params, dict):
+        return {key: REDACTED if key in SENSITIVE_COLUMNS else value for key, value in params.items()}
+    params = list(params)
+    mentions_sensitive = any(column in sql for column in SENSITIVE_COLUMNS)
+    if not mentions_sensitive:
+        return params
+    columns = _placeholder_columns(sql, len(params))
+    return [
+        # Unknown position in a statement that touches a sensitive column: hide it
+        REDACTED if index >= len(columns) or columns[index] is None or columns[index] in SENSITIVE_COLUMNS
+        else value
+        for index, value in enumerate(params)
+    ]
+
+
+# ---------------------------
+# Capture
+# ---------------------------
+def _origin():
+    """The innermost project frames that issued the query."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f"{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()[:-3]
+        if frame.filename.startswith(base_dir) and not frame.filename.endswith('slowlog.py')
+    ]
+    return frames[-5:]
+
+
+def _explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception as exc:  # never let diagnostics break the request
+        return [f"EXPLAIN failed: {exc}"]
+
+
+class SlowQueryLogger:
+    """
+    Execute wrapper that logs ``core`` queries slower than
+    CRM_SLOW_QUERY_MS with redacted parameters, origin and EXPLAIN plan.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_state, 'active', False):
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= settings.CRM_SLOW_QUERY_MS and 'core_' in sql:
+                _state.active = True
+                try:
+                    self.log(context['connection'], sql, params, many, elapsed_ms)
+                finally:
+                    _state.active = False
+
+    def log(self, connection, sql, params, many, elapsed_ms):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': connection.alias,
+            'duration_ms': round(elapsed_ms, 2),
+            'sql': sql,
+            'params': ([redact_params(sql, row) for row in params] if many else redact_params(sql, params)),
+            'origin': _origin(),
+            'explain': None if many else _explain(connection, sql, params),
+        }
+        os.makedirs(os.path.dirname(settings.CRM_SLOW_QUERY_LOG), exist_ok=True)
+        logger.warning(json.dumps(entry, default=str))
+
+
+slow_query_logger = SlowQueryLogger()
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    if slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_logger)
@@ -0,0 +1,166 @@
+import zipfile
+from itertools import islice
+from pathlib import Path
+
+from .models import PROFILE_FIELDS, Client, Interaction, Profile, SalesMade, profile_lookup
+
+try:
+    import numpy as np
+except ImportError:  # Snapshots are optional
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Falls back to compressed NumPy archives
+    pa = pq = None
+
+# Analysis columns only: no card, identity or free-text fields
+SNAPSHOT_COLUMNS = {
+    'client': (Client, (
+        'id', 'created_at', 'converted_at', 'status', 'source', 'city', 'state', 'zip_code',
+        'payment_amount', 'sales_made_id',
+    )),
+    'sales': (SalesMade, (
+        'id', 'created_at', 'city', 'state', 'zip_code', 'payment_amount',
+    )),
+    'interaction': (Interaction, (
+        'id', 'client_id', 'sales_made_id', 'date',
+    )),
+}
+
+FORMATS = ('parquet', 'npz')
+
+
+def default_format():
+    return 'parquet' if pq is not None else 'npz'
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Snapshots need numpy (pip install numpy; pyarrow for Parquet).")
+
+
+# ---------------------------
+# Column conversion
+# ---------------------------
+def _column_kind(model, column):
+    if column in PROFILE_FIELDS and hasattr(model, 'profile'):
+        model = Profile
+    internal_type = model._meta.get_field(column).get_internal_type()
+    if internal_type in ('AutoField', 'BigAutoField', 'ForeignKey', 'OneToOneField'):
+        return 'id'
+    if internal_type == 'DateTimeField':
+        return 'datetime'
+    if internal_type == 'DecimalField':
+        return 'amount'
+    return 'text'
+
+
+def to_array(kind, values):
+    """
+    Turn one column of a chunk into a fixed-width NumPy array.
+
+    Nulls become 0 for ids, NaT for datetimes, NaN for amounts and ''
+    for text, so every column can be used directly in vector maths.
+    """
+    if kind == 'id':
+        return np.array([value or 0 for value in values], dtype=np.int64)
+    if kind == 'datetime':
+        # Stored as naive UTC
+        return np.array([value.replace(tzinfo=None) if value else None for value in values], dtype='datetime64[us]')
+    if kind == 'amount':
+        return np.array([float('nan') if value is None else float(value) for value in values], dtype=np.float64)
+    return np.array([value or '' for value in values], dtype=str)
+
+
+def iter_chunks(model, columns, chunk_size=5000, queryset=None):
+    """Yield ``{column: array}`` for every ``chunk_size`` rows, in pk order."""
+    _require_numpy()
+    queryset = model.objects.all() if queryset is None else queryset
+    kinds = [_column_kind(model, column) for column in columns]
+    lookups = [profile_lookup(model, column) for column in columns]
+    rows = queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        # An empty table still yields one empty chunk so readers see every column
+        columns_values = zip(*chunk) if chunk else [()] * len(columns)
+        yield {column: to_array(kind, values) for column, kind, values in zip(columns, kinds, columns_values)}
+        if len(chunk) < chunk_size:
+            return
+
+
+# ---------------------------
+# Writers
+# ---------------------------
+def write_parquet(chunks, path):
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.table(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_npz(chunks, path):
+    """
+    Write chunks to a compressed ``.npz``-style zip, one ``.npy`` member
+    per column per chunk, so only the current chunk is held in memory.
+    """
+    rows = 0
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for number, chunk in enumerate(chunks):
+            for column, values in chunk.items():
+                with archive.open(f"{number:06d}/{column}.npy", 'w', force_zip64=True) as member:
+                    np.lib.format.write_array(member, values, allow_pickle=False)
+            rows += len(next(iter(chunk.values())))
+    return rows
+
+
+def write_snapshot(name, directory, fmt=None, chunk_size=5000):
+    """Snapshot one of SNAPSHOT_COLUMNS into ``directory``. Returns (path, rows)."""
+    _require_numpy()
+    fmt = fmt or default_format()
+    if fmt == 'parquet' and pq is None:
+        raise RuntimeError("Parquet snapshots need pyarrow (pip install pyarrow).")
+    model, columns = SNAPSHOT_COLUMNS[name]
+    path = Path(directory) / f"{name}.{fmt}"
+    chunks = iter_chunks(model, columns, chunk_size)
+    rows = write_parquet(chunks, path) if fmt == 'parquet' else write_npz(chunks, path)
+    return path, rows
+
+
+# ---------------------------
+# Readers
+# ---------------------------
+def load_snapshot(path):
+    """Load a snapshot file back into ``{column: numpy array}``."""
+    _require_numpy()
+    path = Path(path)
+    if path.suffix == '.parquet':
+        if pq is None:
+            raise RuntimeError("Reading Parquet snapshots needs pyarrow (pip install pyarrow).")
+        table = pq.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    parts = {}
+    with np.load(path, allow_pickle=False) as archive:
+        for key in sorted(archive.files):
+            _, column = key.split('/')
+            parts.setdefault(column, []).append(archive[key])
+    return {column: np.concatenate(arrays) for column, arrays in parts.items()}
+
+
+def find_snapshot(directory, name):
+    for fmt in FORMATS:
+        path = Path(directory) / f"{name}.{fmt}"
+        if path.exists():
+            return path
+    return None
@@ -1,3 +1,1057 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+from importlib import import_module
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import FieldError
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.utils import timezone
+
+from .models import (
+    Client, FunnelWeeklyTotal, Interaction, InteractionArchive, Job, Payment, PaymentDailyTotal, PaymentMonthlyTotal,
+    Profile, SalesMade,
+)
+from . import metrics, views
+from .cache import cache_stats, crm_cache, reset_cache_stats
+from .crypto import current_key
+from .dates import backfill_payment_on, parse_payment_date
+from .dedup import find_duplicates, merge_duplicates, normalize_address, normalize_phone, soundex
+from .importers import import_leads
+from .jobs import INLINE_LIMIT, enqueue, process_next_job
+from .pagination import encode_cursor, keyset_page, keyset_queryset
+from .payments import add_to_total, aget_total, get_month_total, get_total, rebuild_rollups, record_payments
+from .reporting import funnel, rebuild_funnel
+from .routers import STICKY_SESSION_KEY, PrimaryReplicaRouter, ReplicaStickinessMiddleware, use_primary
+from .slowlog import redact_params
+from .timeline import TIMELINE_INLINE_SIZE, archive_interactions, timeline_page
+from .snapshots import FORMATS, load_snapshot, np, pq
+
+
+def clear_caches():
+    for backend in caches.all():
+        backend.clear()
+
+
+# Queries allowed per admin page, whatever the number of rows shown
+QUERY_BUDGET = {
+    'salesmade_changelist': 2,  # user, page (session and count are cached)
+    'client_changelist': 2,
+    'client_change_form': 3,  # user, client, interactions
+}
+
+
+class ConvertManyTests(TestCase):
+
+    def test_converts_active_clients_in_batches(self):
+        for i in range(5):
+            Client.objects.create(first_name='Lead', last_name=str(i), email=f"lead{i}@example.com", phone='555')
+        Client.objects.create(first_name='Old', last_name='Lead', email='old@example.com', status='archived')
+
+        converted = Client.objects.convert_many(Client.objects.all(), batch_size=2)
+
+        self.assertEqual(converted, 5)
+        self.assertEqual(SalesMade.objects.count(), 5)
+        for client in Client.objects.filter(status='converted'):
+            self.assertEqual(client.sales_made.email, client.email)
+            self.assertEqual(client.sales_made.phone, '555')
+        self.assertEqual(Client.objects.get(email='old@example.com').status, 'archived')
+
+    def test_links_existing_sales_made_by_email(self):
+        existing = SalesMade.objects.create(first_name='Kept', last_name='Name', email='lead@example.com')
+        client = Client.objects.create(first_name='Lead', last_name='New', email='lead@example.com')
+
+        Client.objects.convert_many(Client.objects.all())
+
+        client.refresh_from_db()
+        self.assertEqual(client.sales_made, existing)
+        self.assertEqual(SalesMade.objects.get().first_name, 'Kept')
+
+
+class PaymentLedgerTests(TestCase):
+
+    def test_postings_update_rollups_and_rebuild_matches(self):
+        sale = SalesMade.objects.create(first_name='Sale', last_name='One', email='sale@example.com')
+        record_payments([(sale, Decimal('100.00')), (sale, None), (None, Decimal('25.50'))])
+        record_payments([(sale, Decimal('4.50'))])
+
+        self.assertEqual(sale.payments.count(), 2)
+        self.assertEqual(get_total(), Decimal('130.00'))
+        self.assertEqual(get_month_total(), Decimal('130.00'))
+        self.assertEqual(PaymentDailyTotal.objects.get().payment_count, 3)
+
+        PaymentMonthlyTotal.objects.update(total_amount=0)
+        self.assertEqual(rebuild_rollups(batch_size=1), Decimal('130.00'))
+        self.assertEqual(get_month_total(), Decimal('130.00'))
+
+    def test_opening_balance_carries_the_pre_ledger_total(self):
+        add_to_total(Decimal('500.00'))
+        seed = import_module('core.migrations.0033_payment_opening_balance').seed_opening_balance
+        seed(django_apps, None)
+        seed(django_apps, None)
+        record_payments([(None, Decimal('30.00'))])
+
+        out = StringIO()
+        call_command('rebuild_payment_rollups', '--fix-total', stdout=out)
+        self.assertIn('totals match', out.getvalue())
+        self.assertEqual(get_total(), Decimal('530.00'))
+        self.assertEqual(get_month_total(), Decimal('30.00'))
+        self.assertEqual(Payment.objects.get(opening_balance=True).amount, Decimal('500.00'))
+
+    def test_opening_balance_fits_the_largest_running_total(self):
+        add_to_total(Decimal('2500000000.00'))
+        import_module('core.migrations.0033_payment_opening_balance').seed_opening_balance(django_apps, None)
+        opening = Payment.objects.get(opening_balance=True)
+        self.assertEqual(opening.amount, Decimal('2500000000.00'))
+        # SQLite doesn't enforce max_digits; the field validators do
+        opening.full_clean()
+
+
+class ReportingTests(TestCase):
+
+    def setUp(self):
+        for i, (source, state) in enumerate([('web', 'TX'), ('web', 'TX'), ('web', 'CA'), ('referral', 'TX')]):
+            Client.objects.create(first_name='Lead', last_name=str(i), email=f"funnel{i}@example.com",
+                                  source=source, state=state, payment_amount=Decimal('100.00'))
+
+    def rollup_rows(self):
+        return sorted(FunnelWeeklyTotal.objects.values_list(
+            'week', 'source', 'state', 'leads', 'conversions', 'booked_revenue', 'collected'))
+
+    def test_events_update_rollups_and_rebuild_matches(self):
+        Client.objects.get(email='funnel0@example.com').convert_to_sales_made()
+        Client.objects.convert_many(Client.objects.filter(email__in=['funnel2@example.com', 'funnel3@example.com']))
+        sale = Client.objects.get(email='funnel0@example.com').sales_made
+        record_payments([(sale, Decimal('40.00')), (None, Decimal('5.00'))])
+
+        by_source = {row['source']: row for row in funnel('source')}
+        self.assertEqual(by_source['web']['leads'], 3)
+        self.assertEqual(by_source['web']['conversions'], 2)
+        self.assertEqual(by_source['web']['booked_revenue'], '200.00')
+        self.assertEqual(by_source['web']['collected'], '40.00')
+        self.assertEqual(by_source['referral']['conversion_rate'], 1.0)
+        self.assertEqual(by_source['unknown']['collected'], '5.00')
+
+        incremental = self.rollup_rows()
+        FunnelWeeklyTotal.objects.all().delete()
+        rebuild_funnel(batch_size=1)
+        self.assertEqual(self.rollup_rows(), incremental)
+
+    def test_json_endpoint_and_admin_page_are_staff_only(self):
+        url = '/reports/funnel/?group_by=state'
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff = User.objects.create_superuser('reports', 'reports@example.com', 'pw')
+        self.client.force_login(staff)
+        payload = self.client.get(url).json()
+        self.assertEqual([(row['state'], row['leads']) for row in payload['rows']], [('CA', 1), ('TX', 3)])
+        self.assertEqual(self.client.get('/reports/funnel/?group_by=email').status_code, 400)
+
+        response = self.client.get('/admin/crm/reports/?group_by=week')
+        self.assertContains(response, 'Lead funnel')
+        self.assertContains(response, 'funnel-bar')
+
+
+@unittest.skipIf(np is None, "Snapshots need numpy")
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        for i, (source, state, amount) in enumerate([('web', 'TX', '100.00'), ('web', 'CA', '50.00'), ('ads', 'TX', None)]):
+            Client.objects.create(first_name='Snap', last_name=str(i), email=f"snap{i}@example.com",
+                                  source=source, state=state, payment_amount=amount and Decimal(amount))
+        Client.objects.convert_many(Client.objects.filter(source='web'))
+        Interaction.objects.create(client=Client.objects.get(email='snap0@example.com'), note='Called')
+
+    def test_snapshot_round_trip_and_stats(self):
+        for fmt in FORMATS:
+            if fmt == 'parquet' and pq is None:
+                continue
+            with self.subTest(fmt=fmt), tempfile.TemporaryDirectory() as directory:
+                out = StringIO()
+                call_command('snapshot_sales', output_dir=directory, format=fmt, chunk_size=2, stats=True,
+                             stdout=out, stderr=StringIO())
+
+                clients = load_snapshot(f"{directory}/client.{fmt}")
+                self.assertEqual(len(clients['id']), 3)
+                self.assertTrue(np.isnat(clients['converted_at']).any())
+
+                stats = json.loads(out.getvalue())
+                self.assertEqual(stats['revenue']['revenue'], 150.0)
+                self.assertEqual(stats['revenue']['revenue_by_state'], {'CA': 50.0, 'TX': 100.0})
+                self.assertEqual(stats['conversion']['converted'], 2)
+                self.assertEqual(stats['conversion']['conversion_by_source']['ads']['rate'], 0.0)
+                self.assertEqual(stats['conversion']['avg_interactions_converted'], 0.5)
+
+
+class DedupTests(TestCase):
+
+    def test_normalizers(self):
+        self.assertEqual(normalize_phone('+1 (512) 555-0100'), normalize_phone('512.555.0100'))
+        self.assertEqual(normalize_address('12 Main Street, Apt. 4'), '12 main st apt 4')
+        self.assertEqual((soundex('Robert'), soundex('Rupert'), soundex('Ashcraft')), ('R163', 'R163', 'A261'))
+
+    def test_finds_and_merges_near_duplicates(self):
+        original = Client.objects.create(first_name='Maria', last_name='Garcia', email='maria@example.com',
+                                         phone='(512) 555-0100', address='12 Main Street', zip_code='78701')
+        copy = Client.objects.create(first_name='MARIA', last_name='Garcai', email='mgarcia@work.example',
+                                     phone='1-512-555-0100', address='12 Main St.', zip_code='78701-1234',
+                                     city='Austin')
+        Client.objects.create(first_name='Mario', last_name='Gomez', email='mario@example.com',
+                              phone='512-555-0199', address='40 Oak Road', zip_code='78701')
+        Interaction.objects.create(client=copy, note='Called back')
+
+        clusters, stats = find_duplicates()
+        self.assertEqual(clusters, [[original.id, copy.id]])
+        self.assertLess(stats.comparisons, 3)
+
+        self.assertEqual(merge_duplicates(clusters), 1)
+        original.refresh_from_db()
+        copy.refresh_from_db()
+        self.assertEqual(copy.status, 'archived')
+        self.assertEqual(original.city, 'Austin')
+        self.assertEqual(original.client_interactions.get().note, 'Called back')
+        self.assertEqual(find_duplicates()[0], [])
+
+    def test_merge_moves_archived_notes_to_the_survivor(self):
+        original = Client.objects.create(first_name='Ann', last_name='Lee', email='ann@example.com')
+        copy = Client.objects.create(first_name='Ann', last_name='Lee', email='ann.lee@example.com')
+        old = Interaction.objects.create(client=copy, note='Old call')
+        Interaction.objects.filter(pk=old.pk).update(date=timezone.now() - timedelta(days=400))
+        self.assertEqual(archive_interactions(timezone.now() - timedelta(days=365)), 1)
+
+        self.assertEqual(merge_duplicates([[original.id, copy.id]]), 1)
+        entries, _ = timeline_page('client', original.pk)
+        self.assertEqual([(entry['note'], entry['archived']) for entry in entries], [('Old call', True)])
+
+
+class PaymentDateTests(TestCase):
+
+    def test_parses_common_formats(self):
+        for text in ('03-15-2024', '3/15/2024', '03/15/24', '2024-03-15', 'March 15, 2024', 'Mar. 15th 2024', '15 March 2024'):
+            self.assertEqual(parse_payment_date(text), date(2024, 3, 15), text)
+        for text in ('', None, 'next friday', '15/31/2024'):
+            self.assertIsNone(parse_payment_date(text))
+
+    def test_save_parses_and_backfill_reports_unparsable(self):
+        client = Client.objects.create(first_name='Pay', last_name='Day', email='payday@example.com', payment_date='1/2/2025')
+        self.assertEqual(client.payment_on, date(2025, 1, 2))
+
+        Client.objects.create(first_name='Pay', last_name='Later', email='later@example.com', payment_date='when paid')
+        Profile.objects.update(payment_on=None)
+        unparsable = []
+        self.assertEqual(backfill_payment_on(Profile, batch_size=1, report=lambda pk, text: unparsable.append(text)), (1, 1))
+        self.assertEqual(unparsable, ['when paid'])
+        self.assertEqual(Client.objects.get(profile__payment_on__range=(date(2025, 1, 1), date(2025, 1, 31))), client)
+
+
+class InteractionTimelineTests(TestCase):
+
+    def setUp(self):
+        self.lead = Client.objects.create(first_name='Lead', last_name='Timeline', email='timeline@example.com')
+        now = timezone.now()
+        Interaction.objects.bulk_create([Interaction(client=self.lead, note=f"Note {i}") for i in range(30)])
+        # bulk_create honours auto_now_add, so spread the dates afterwards: Note 0 is the oldest
+        for interaction in Interaction.objects.all():
+            Interaction.objects.filter(pk=interaction.pk).update(date=now - timedelta(days=400 - int(interaction.note[5:])))
+
+    def walk(self, per_page):
+        notes, cursor = [], None
+        while True:
+            entries, cursor = timeline_page('client', self.lead.pk, cursor, per_page)
+            notes += [(entry['note'], entry['archived']) for entry in entries]
+            if cursor is None:
+                return notes
+
+    def test_archive_then_page_across_live_and_archived_notes(self):
+        cutoff = timezone.now() - timedelta(days=390, hours=12)
+        self.assertEqual(archive_interactions(cutoff, batch_size=4), 10)
+        self.assertEqual(Interaction.objects.count(), 20)
+        self.assertEqual(InteractionArchive.objects.order_by('date').first().note, 'Note 0')
+
+        expected = [(f"Note {i}", i < 10) for i in reversed(range(30))]
+        for per_page in (7, 10, 20, 50):
+            self.assertEqual(self.walk(per_page), expected, per_page)
+
+    def test_inline_renders_latest_notes_and_endpoint_pages_older(self):
+        superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(superuser)
+        response = self.client.get(f'/admin/core/client/{self.lead.pk}/change/')
+        self.assertEqual(response.context['inline_admin_formsets'][0].formset.total_form_count(), TIMELINE_INLINE_SIZE)
+        self.assertContains(response, 'Load older notes')
+
+        cursor = response.context['inline_admin_formsets'][0].formset.older_cursor
+        page = self.client.get(f'/admin/crm/interactions/client/{self.lead.pk}/', {'cursor': cursor}).json()
+        self.assertEqual(page['entries'][0]['note'], f"Note {29 - TIMELINE_INLINE_SIZE}")
+        self.assertEqual(self.client.get(f'/admin/crm/interactions/nobody/{self.lead.pk}/').status_code, 404)
+
+
+    def test_inline_post_edits_the_notes_it_rendered(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        inline = admin.site._registry[Client].get_inline_instances(request, self.lead)[0]
+        formset_class = inline.get_formset(request, self.lead)
+        rendered = formset_class(instance=self.lead)
+
+        # A newer note moves the window before the form comes back
+        Interaction.objects.create(client=self.lead, note='Newer')
+        data = {
+            f'{rendered.prefix}-TOTAL_FORMS': len(rendered.forms),
+            f'{rendered.prefix}-INITIAL_FORMS': len(rendered.forms),
+        }
+        for form in rendered.forms:
+            data[f'{form.prefix}-id'] = form.instance.pk
+            data[f'{form.prefix}-note'] = form.instance.note
+        data[f'{rendered.forms[-1].prefix}-note'] = 'Edited'
+        submitted = formset_class(data, instance=self.lead)
+        self.assertEqual(list(submitted.get_queryset()), [form.instance for form in rendered.forms])
+        self.assertTrue(submitted.is_valid(), submitted.errors)
+        submitted.save()
+
+        self.assertEqual(Interaction.objects.get(pk=rendered.forms[-1].instance.pk).note, 'Edited')
+        self.assertEqual(Interaction.objects.filter(client=self.lead).count(), 31)
+
+
+class SharedInteractionTests(TestCase):
+
+    def make_lead(self, name, notes):
+        lead = Client.objects.create(first_name='Lead', last_name=name, email=f"{name}@example.com")
+        Interaction.objects.bulk_create([Interaction(client=lead, note=f"{name} {i}") for i in range(notes)])
+        return lead
+
+    def interaction_updates(self, queries):
+        return [q['sql'] for q in queries if q['sql'].startswith('UPDATE "core_interaction"')]
+
+    def test_conversion_repoints_thousands_of_notes_in_one_update(self):
+        lead = self.make_lead('single', 3000)
+        with CaptureQueriesContext(connection) as queries:
+            lead.convert_to_sales_made()
+        self.assertEqual(len(self.interaction_updates(queries)), 1)
+
+        sale = lead.sales_made
+        self.assertEqual(sale.sales_interactions.count(), 3000)
+        Interaction.objects.create(sales_made=sale, note='After sale')
+        Interaction.objects.create(client=lead, note='Late lead note')
+
+        client_side = Interaction.objects.timeline(client_id=lead.pk, sales_made_id=lead.sales_made_id)
+        sales_side = Interaction.objects.timeline(sales_made_id=sale.pk)
+        self.assertEqual(list(client_side[:50]), list(sales_side[:50]))
+        self.assertEqual(client_side.count(), 3002)
+        self.assertIn('interaction_sales_date_idx', client_side[:50].explain())
+
+    def test_convert_many_repoints_each_batch_with_one_update(self):
+        leads = [self.make_lead(f"bulk{i}", 1500) for i in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            Client.objects.convert_many(Client.objects.all(), batch_size=2)
+        self.assertEqual(len(self.interaction_updates(queries)), 2)
+        for lead in leads:
+            lead.refresh_from_db()
+            self.assertEqual(Interaction.objects.timeline(sales_made_id=lead.sales_made_id).count(), 1500)
+            self.assertFalse(lead.sales_made.sales_interactions.exclude(client=lead).exists())
+
+    def test_archived_notes_follow_the_lead_to_its_sale(self):
+        leads = [self.make_lead(f"archived{i}", 4) for i in range(3)]
+        Interaction.objects.filter(note__endswith=' 0').update(date=timezone.now() - timedelta(days=400))
+        self.assertEqual(archive_interactions(timezone.now() - timedelta(days=365)), 3)
+
+        def archived_on_sale(lead):
+            lead.refresh_from_db()
+            entries, _ = timeline_page('sales', lead.sales_made_id, None, 10)
+            return [entry['note'] for entry in entries if entry['archived']]
+
+        leads[0].convert_to_sales_made()
+        self.assertEqual(archived_on_sale(leads[0]), ['archived0 0'])
+        Client.objects.convert_many(Client.objects.filter(pk=leads[1].pk))
+        self.assertEqual(archived_on_sale(leads[1]), ['archived1 0'])
+
+        # Converted before notes were shared: the migration catches up
+        Client.objects.filter(pk=leads[2].pk).update(sales_made=SalesMade.objects.create(
+            first_name='Lead', last_name='archived2', email='archived2@example.com'))
+        import_module('core.migrations.0027_share_converted_interactions').share_interactions(django_apps, None)
+        self.assertEqual(archived_on_sale(leads[2]), ['archived2 0'])
+
+    def test_legacy_mode_leaves_notes_on_the_lead(self):
+        lead = self.make_lead('legacy', 5)
+        lead.convert_to_sales_made(share_interactions=False)
+        self.assertFalse(lead.sales_made.sales_interactions.exists())
+
+
+class SharedProfileTests(TestCase):
+
+    def test_conversion_points_the_sale_at_the_lead_profile(self):
+        lead = Client.objects.create(first_name='Ann', last_name='Lee', email='ann@example.com',
+                                     city='Austin', card_cvv='123', payment_date='03-15-2025')
+        self.assertEqual(lead.profile.payment_on, date(2025, 3, 15))
+
+        with CaptureQueriesContext(connection) as queries:
+            lead.convert_to_sales_made()
+        self.assertFalse([q for q in queries if 'INSERT INTO "core_profile"' in q['sql']])
+        self.assertEqual(lead.sales_made.profile_id, lead.profile_id)
+        self.assertEqual(Profile.objects.count(), 1)
+
+        sale = SalesMade.objects.get()
+        sale.city = 'Dallas'
+        sale.save()
+        lead.refresh_from_db()
+        self.assertEqual(lead.city, 'Dallas')
+
+    def test_bulk_create_inserts_profiles_in_one_batch(self):
+        with CaptureQueriesContext(connection) as queries:
+            Client.objects.bulk_create([
+                Client(first_name='Bulk', last_name=str(i), email=f"bulk{i}@example.com", state='TX') for i in range(5)
+            ] + [Client(first_name='Bare', last_name='Lead', email='bare@example.com')])
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "core_profile"')]), 1)
+        self.assertEqual(Client.objects.filter(profile__state='TX').count(), 5)
+        self.assertIsNone(Client.objects.get(email='bare@example.com').profile)
+
+    def test_bulk_create_drops_profiles_of_conflicting_rows(self):
+        Client.objects.create(first_name='Known', last_name='Lead', email='known@example.com')
+        Client.objects.bulk_create([
+            Client(first_name='Known', last_name='Again', email='known@example.com', city='Austin'),
+            Client(first_name='New', last_name='Lead', email='new@example.com', city='Dallas'),
+        ], ignore_conflicts=True)
+        self.assertEqual(list(Profile.objects.values_list('city', flat=True)), ['Dallas'])
+        self.assertEqual(Client.objects.get(email='new@example.com').city, 'Dallas')
+
+    def test_admin_form_edits_profile_and_delete_drops_orphans(self):
+        superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(superuser)
+        lead = Client.objects.create(first_name='Ann', last_name='Lee', email='ann@example.com', city='Austin')
+        response = self.client.get(f'/admin/core/client/{lead.pk}/change/')
+        self.assertContains(response, 'value="Austin"')
+
+        data = {name: value for name, value in response.context['adminform'].form.initial.items() if value is not None}
+        data.update({
+            'city': 'Houston', 'date_of_birth': '02-28-1980',
+            'client_interactions-TOTAL_FORMS': 0, 'client_interactions-INITIAL_FORMS': 0,
+        })
+        self.client.post(f'/admin/core/client/{lead.pk}/change/', data)
+        lead.refresh_from_db()
+        self.assertEqual((lead.city, lead.date_of_birth), ('Houston', date(1980, 2, 28)))
+
+        lead.delete()
+        self.assertFalse(Profile.objects.exists())
+
+
+class FieldEncryptionTests(TestCase):
+
+    def _stored(self, profile_id, column):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {column} FROM core_profile WHERE id = %s', [profile_id])
+            return cursor.fetchone()[0]
+
+    def _lead(self, i=0, **fields):
+        return Client.objects.create(first_name='Ann', last_name='Lee', email=f"ann{i}@example.com", **fields)
+
+    def test_values_are_stored_encrypted(self):
+        lead = self._lead(card_number='4111111111111111', card_cvv='123', ssn_last4='6789', mother_maiden_name='Smith')
+        other = self._lead(1, card_number='4111111111111111', card_cvv='123')
+
+        stored = self._stored(lead.profile_id, 'card_number')
+        self.assertTrue(stored.startswith(current_key().prefix))
+        self.assertNotIn('4111', stored)
+        # Deterministic columns repeat, randomized ones don't
+        self.assertEqual(stored, self._stored(other.profile_id, 'card_number'))
+        self.assertNotEqual(self._stored(lead.profile_id, 'card_cvv'), self._stored(other.profile_id, 'card_cvv'))
+
+        lead = Client.objects.get(pk=lead.pk)
+        self.assertEqual((lead.card_number, lead.card_cvv, lead.ssn_last4, lead.mother_maiden_name),
+                         ('4111111111111111', '123', '6789', 'Smith'))
+
+    def test_deterministic_lookups_and_unsupported_ones(self):
+        self._lead(card_number='4111111111111111', ssn_last4='6789', card_cvv='123')
+        self._lead(1, ssn_last4='1234')
+        self.assertEqual(Client.objects.filter(profile__card_number='4111111111111111').count(), 1)
+        self.assertEqual(Client.objects.filter(profile__ssn_last4__in=['6789', '1234', '0000']).count(), 2)
+        self.assertEqual(Client.objects.filter(profile__card_number__isnull=True).count(), 1)
+        with self.assertRaises(FieldError):
+            Client.objects.filter(profile__card_cvv='123').count()
+        with self.assertRaises(FieldError):
+            Client.objects.filter(profile__card_number__startswith='4111').count()
+
+    def test_list_view_does_not_load_encrypted_columns(self):
+        clear_caches()
+        sale = self._lead(card_number='4111111111111111', card_cvv='123', payment_amount=Decimal('10.00'))
+        sale.convert_to_sales_made()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get('/sales-made/'), '$10.00')
+        self.assertFalse([q for q in queries if 'card_number' in q['sql'] or 'card_cvv' in q['sql']])
+
+    def test_rotation_reencrypts_old_and_plaintext_rows(self):
+        with override_settings(CRM_FIELD_KEYS=['old-key']):
+            rotated = self._lead(card_number='4111111111111111', card_cvv='123')
+        legacy = self._lead(1, city='Austin')
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE core_profile SET ssn_last4 = '6789' WHERE id = %s", [legacy.profile_id])
+
+        with override_settings(CRM_FIELD_KEYS=['new-key', 'old-key']):
+            # Rows under the old key still match until they are rotated
+            self.assertTrue(Client.objects.filter(pk=rotated.pk, profile__card_number='4111111111111111').exists())
+            out = StringIO()
+            call_command('rotate_field_keys', batch_size=1, stdout=out)
+            self.assertIn('2 rows re-encrypted', out.getvalue())
+            prefix = current_key().prefix
+            self.assertTrue(self._stored(rotated.profile_id, 'card_number').startswith(prefix))
+            self.assertTrue(self._stored(rotated.profile_id, 'card_cvv').startswith(prefix))
+            self.assertTrue(self._stored(legacy.profile_id, 'ssn_last4').startswith(prefix))
+
+            call_command('rotate_field_keys', stdout=out)
+            self.assertIn('0 rows re-encrypted', out.getvalue())
+
+        with override_settings(CRM_FIELD_KEYS=['new-key']):
+            rotated = Client.objects.get(pk=rotated.pk)
+            self.assertEqual((rotated.card_number, rotated.card_cvv), ('4111111111111111', '123'))
+            self.assertEqual(Client.objects.get(pk=legacy.pk).ssn_last4, '6789')
+
+
+class AdminSearchTests(TestCase):
+
+    def search(self, model, term):
+        model_admin = admin.site._registry[model]
+        results, _ = model_admin.get_search_results(None, model.objects.all(), term)
+        return sorted(results.values_list('email', flat=True))
+
+    def test_substring_search_matches_icontains(self):
+        Client.objects.create(first_name='Johnny', last_name='Smithers', email='js@example.com', phone='555-867-5309')
+        client = Client.objects.create(first_name='Anna', last_name='Smith', email='anna@example.org')
+        SalesMade.objects.create(first_name='Johnny', last_name='Cash', email='cash@example.com')
+
+        self.assertEqual(self.search(Client, 'smith'), ['anna@example.org', 'js@example.com'])
+        self.assertEqual(self.search(Client, 'ohn 867-53'), ['js@example.com'])
+        self.assertEqual(self.search(Client, 'jo'), ['js@example.com'])
+        self.assertEqual(self.search(SalesMade, 'JOHN'), ['cash@example.com'])
+
+        client.email = 'anna@moved.net'
+        client.save()
+        self.assertEqual(self.search(Client, 'moved'), ['anna@moved.net'])
+        client.delete()
+        self.assertEqual(self.search(Client, 'smith'), ['js@example.com'])
+
+
+class AdminQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_login(self.superuser)
+
+    def add_sales(self, count):
+        start = SalesMade.objects.count()
+        for i in range(start, start + count):
+            sale = SalesMade.objects.create(first_name='Sale', last_name=str(i), email=f"sale{i}@example.com")
+            Interaction.objects.create(sales_made=sale, note='Called')
+
+    def add_client_with_interactions(self, count):
+        client = Client.objects.create(first_name='Lead', last_name='One', email=f"lead{count}@example.com")
+        Interaction.objects.bulk_create([Interaction(client=client, note=f"Note {i}") for i in range(count)])
+        return client
+
+    def test_salesmade_changelist_query_count_is_flat(self):
+        self.add_sales(2)
+        self.client.get('/admin/core/salesmade/')  # warm the banner cache
+        with self.assertNumQueries(QUERY_BUDGET['salesmade_changelist']):
+            self.client.get('/admin/core/salesmade/')
+        self.add_sales(40)
+        with self.assertNumQueries(QUERY_BUDGET['salesmade_changelist']):
+            self.client.get('/admin/core/salesmade/')
+
+    def test_client_changelist_query_count_is_flat(self):
+        self.add_client_with_interactions(1)
+        self.client.get('/admin/core/client/')  # warm the count cache
+        with self.assertNumQueries(QUERY_BUDGET['client_changelist']):
+            self.client.get('/admin/core/client/')
+        for i in range(40):
+            Client.objects.create(first_name='Lead', last_name=str(i), email=f"more{i}@example.com")
+        with self.assertNumQueries(QUERY_BUDGET['client_changelist']):
+            self.client.get('/admin/core/client/')
+
+    def test_change_form_query_count_ignores_interaction_count(self):
+        few = self.add_client_with_interactions(2)
+        many = self.add_client_with_interactions(50)
+        self.client.get(f'/admin/core/client/{few.pk}/change/')  # warm the content type cache
+        with self.assertNumQueries(QUERY_BUDGET['client_change_form']):
+            self.client.get(f'/admin/core/client/{few.pk}/change/')
+        with self.assertNumQueries(QUERY_BUDGET['client_change_form']):
+            self.client.get(f'/admin/core/client/{many.pk}/change/')
+
+
+class ExportTests(TestCase):
+
+    def test_admin_action_streams_csv_without_sensitive_columns(self):
+        superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(superuser)
+        sale = SalesMade.objects.create(first_name='Sale', last_name='One', email='sale@example.com', card_cvv='123')
+
+        selection = {'action': 'export_selected_csv', '_selected_action': [sale.pk]}
+        response = self.client.post('/admin/core/salesmade/', selection)
+        self.assertContains(response, 'name="columns"')
+        form = response.context['form']
+        self.assertIn('card_cvv', dict(form.fields['columns'].choices))
+        self.assertNotIn('card_cvv', form.fields['columns'].initial)
+
+        response = self.client.post('/admin/core/salesmade/', {
+            **selection, 'apply': '1', 'columns': form.fields['columns'].initial,
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('email', lines[0])
+        self.assertNotIn('card_cvv', lines[0])
+        self.assertIn('sale@example.com', lines[1])
+
+    def test_admin_action_exports_chosen_columns_and_dates(self):
+        superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(superuser)
+        old = Client.objects.create(first_name='Old', last_name='Lead', email='old@example.com')
+        Client.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+        new = Client.objects.create(first_name='New', last_name='Lead', email='new@example.com')
+
+        response = self.client.post('/admin/core/client/', {
+            'action': 'export_selected_csv', '_selected_action': [old.pk, new.pk], 'apply': '1',
+            'columns': ['email', 'first_name'], 'since': timezone.localdate() - timedelta(days=7),
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['email,first_name', 'new@example.com,New'])
+
+    def test_command_filters_columns_and_dates(self):
+        old = Client.objects.create(first_name='Old', last_name='Lead', email='old@example.com')
+        Client.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+        Client.objects.create(first_name='New', last_name='Lead', email='new@example.com')
+        out = StringIO()
+
+        since = (timezone.localdate() - timedelta(days=7)).strftime('%m-%d-%Y')
+        call_command('export_records', 'client', '--columns', 'email,first_name', '--since', since,
+                     stdout=out, stderr=StringIO())
+
+        self.assertEqual(out.getvalue().splitlines(), ['email,first_name', 'new@example.com,New'])
+
+
+class ImportLeadsTests(TestCase):
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        Client.objects.create(first_name='Known', last_name='Lead', email='known@example.com')
+        rows = [
+            'first_name,last_name,email,date_of_birth,phone',
+            'Ann,Lee,ann@example.com,02-28-1980,555',
+            'Known,Lead,known@example.com,,',
+            'Bad,Date,bad@example.com,1980-02-28,',
+            'Ann,Again,ann@example.com,,',
+            'Bob,Ray,bob@example.com,,',
+        ]
+        errors = StringIO()
+        batches = []
+
+        stats = import_leads(StringIO('\n'.join(rows)), batch_size=2, source='vendor-a',
+                             error_writer=csv.writer(errors), on_batch=lambda number, _: batches.append(number))
+
+        self.assertEqual((stats.rows, stats.inserted, stats.duplicates, stats.invalid), (5, 2, 2, 1))
+        self.assertEqual(batches, [1, 2, 3])
+        ann = Client.objects.get(email='ann@example.com')
+        self.assertEqual((ann.date_of_birth.isoformat(), ann.source, ann.status), ('1980-02-28', 'vendor-a', 'active'))
+        self.assertTrue(Client.objects.filter(email='bob@example.com').exists())
+        report = list(csv.reader(StringIO(errors.getvalue())))
+        self.assertEqual(len(report), 2)
+        self.assertEqual(report[1][:2], ['4', 'bad@example.com'])
+
+    def test_rows_inserted_concurrently_are_rejected_not_counted(self):
+        Client.objects.create(first_name='Known', last_name='Lead', email='known@example.com')
+        rows = ['first_name,last_name,email', 'Ann,Lee,ann@example.com', 'Known,Lead,known@example.com']
+        errors = StringIO()
+        # As if known@example.com was inserted after the batch's lookups
+        with mock.patch.object(Client.objects, 'filter', return_value=Client.objects.none()):
+            stats = import_leads(StringIO('\n'.join(rows)), error_writer=csv.writer(errors))
+
+        self.assertEqual((stats.rows, stats.inserted, stats.duplicates, stats.invalid), (2, 1, 0, 1))
+        self.assertEqual(list(csv.reader(StringIO(errors.getvalue())))[1][:2], ['3', 'known@example.com'])
+        self.assertTrue(Client.objects.filter(email='ann@example.com').exists())
+        self.assertEqual(FunnelWeeklyTotal.objects.aggregate(leads=Sum('leads'))['leads'], Client.objects.count())
+
+
+class SalesMadeListViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        sale = SalesMade.objects.create(first_name='Sale', last_name='One', email='sale@example.com')
+        self.lead = Client.objects.create(first_name='Converted', last_name='Lead', email='lead@example.com',
+                                          sales_made=sale, status='converted', payment_amount=Decimal('50.00'))
+        Client.objects.create(first_name='Still', last_name='Active', email='active@example.com')
+
+    def test_lists_converted_clients_only(self):
+        response = self.client.get('/sales-made/')
+        self.assertContains(response, 'Converted')
+        self.assertNotContains(response, 'Still')
+
+    def test_conditional_get_and_invalidation(self):
+        first = self.client.get('/sales-made/')
+        etag = first['ETag']
+
+        # Only the version row is read
+        with self.assertNumQueries(1):
+            cached = self.client.get('/sales-made/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/add-payment/{self.lead.pk}/')
+        refreshed = self.client.get('/sales-made/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed['ETag'], etag)
+        self.assertContains(refreshed, '$50.00')
+
+    def test_version_is_shared_through_the_database(self):
+        etag = self.client.get('/sales-made/')['ETag']
+        # Another worker: its own (empty) caches, the same database
+        clear_caches()
+        self.assertEqual(self.client.get('/sales-made/')['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lead.save()
+        clear_caches()
+        self.assertNotEqual(self.client.get('/sales-made/')['ETag'], etag)
+
+
+class CacheStatsTests(TestCase):
+
+    def test_counts_hits_and_misses_and_renders_page(self):
+        clear_caches()
+        reset_cache_stats()
+        crm_cache.get('missing')
+        crm_cache.set('present', 1)
+        crm_cache.get('present')
+
+        stats = {row['alias']: row for row in cache_stats()}
+        self.assertEqual((stats['crm']['hits'], stats['crm']['misses'], stats['crm']['sets']), (1, 1, 1))
+        self.assertEqual(stats['crm']['hit_rate'], 0.5)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.assertContains(self.client.get('/admin/crm/cache/'), 'LocMemCache')
+
+    def test_other_backends_report_no_entry_count(self):
+        # Never connected to: sizing a Redis cache would need a round trip (and redis-py)
+        redis = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:1/0'}
+        with override_settings(CACHES={**settings.CACHES, 'crm': redis}):
+            stats = {row['alias']: row for row in cache_stats()}
+        self.assertEqual(stats['crm']['backend'], 'RedisCache')
+        self.assertIsNone(stats['crm']['entries'])
+        self.assertIsNotNone(stats['default']['entries'])
+
+
+class AsyncViewTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        sale = SalesMade.objects.create(first_name='Sale', last_name='One', email='sale@example.com')
+        self.lead = Client.objects.create(first_name='Converted', last_name='Lead', email='lead@example.com',
+                                          sales_made=sale, status='converted', payment_amount=Decimal('75.00'))
+
+    async def test_async_list_and_payment(self):
+        factory = AsyncRequestFactory()
+
+        response = await views.async_sales_made_list(factory.get('/sales-made/'))
+        self.assertContains(response, 'Converted')
+
+        response = await views.async_confirm_add_payment(factory.post('/'), self.lead.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(await aget_total(), Decimal('75.00'))
+
+
+class JobQueueTests(TestCase):
+
+    def make_clients(self, count):
+        Client.objects.bulk_create([
+            Client(first_name='Lead', last_name=str(i), email=f"job{i}@example.com") for i in range(count)
+        ])
+        return Client.objects.filter(email__startswith='job')
+
+    def test_worker_processes_job_in_chunks(self):
+        job, = enqueue('convert_clients', self.make_clients(7), chunk_size=3)
+
+        self.assertEqual(process_next_job('worker-1'), job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.progress), ('done', 7, 100))
+        self.assertEqual(Client.objects.filter(status='converted').count(), 7)
+        self.assertIsNone(process_next_job('worker-1'))
+
+    def test_stale_job_resumes_from_checkpoint(self):
+        sales = [SalesMade(first_name='Sale', last_name=str(i), email=f"s{i}@example.com",
+                           payment_amount=Decimal('10.00')) for i in range(5)]
+        SalesMade.objects.bulk_create(sales)
+        job, = enqueue('add_payments', SalesMade.objects.all(), chunk_size=2)
+        # A worker died after committing the first chunk
+        first_chunk = job.object_ids[:2]
+        record_payments([(sale, sale.payment_amount) for sale in SalesMade.objects.filter(pk__in=first_chunk)])
+        Job.objects.filter(pk=job.pk).update(status='running', processed=2, locked_by='dead',
+                                             locked_at=timezone.now() - timedelta(hours=1))
+
+        process_next_job('worker-2')
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('done', 'worker-2'))
+        self.assertEqual(get_total(), Decimal('50.00'))
+
+    def test_admin_queues_large_selections(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        clients = self.make_clients(INLINE_LIMIT + 1)
+
+        self.client.post('/admin/core/client/', {
+            'action': 'convert_selected_clients',
+            '_selected_action': list(clients.values_list('pk', flat=True)),
+        })
+
+        self.assertEqual(Job.objects.get().total, INLINE_LIMIT + 1)
+        self.assertFalse(Client.objects.filter(status='converted').exists())
+
+
+class PerformanceMetricsTests(TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        clear_caches()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def test_records_admin_requests_and_exports_prometheus_text(self):
+        self.client.get('/admin/core/client/')
+        self.client.get('/admin/core/client/')
+
+        row, = [row for row in metrics.worst_offenders() if row['view'] == 'admin:core_client_changelist']
+        self.assertEqual(row['count'], 2)
+        self.assertGreater(row['avg_sql_count'], 0)
+        self.assertGreater(row['avg_template_time'], 0)
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('crm_request_latency_seconds{view="admin:core_client_changelist",quantile="0.95"}', body)
+        self.assertIn('crm_request_latency_seconds_count{view="admin:core_client_changelist"} 2', body)
+        self.assertContains(self.client.get('/admin/crm/performance/'), 'admin:core_client_changelist')
+
+    def test_counts_and_sums_keep_growing_past_the_sample_window(self):
+        def scrape():
+            body = metrics.prometheus_text()
+            return {
+                line.split('{')[0]: float(line.rsplit(' ', 1)[1])
+                for line in body.splitlines() if 'view="bench"' in line and 'quantile' not in line
+            }
+
+        for _ in range(2):
+            for _ in range(metrics.SAMPLES_PER_VIEW):
+                sample = metrics.RequestSample()
+                sample.latency, sample.sql_count = 0.01, 2
+                metrics.record('bench', sample)
+            totals = scrape()
+            self.assertLessEqual(len(metrics._samples['bench']), metrics.SAMPLES_PER_VIEW)
+
+        self.assertEqual(totals['crm_request_latency_seconds_count'], 2 * metrics.SAMPLES_PER_VIEW)
+        self.assertAlmostEqual(totals['crm_request_latency_seconds_sum'], 0.02 * metrics.SAMPLES_PER_VIEW, places=3)
+        self.assertEqual(totals['crm_sql_queries_total'], 4 * metrics.SAMPLES_PER_VIEW)
+        self.assertIn('# TYPE crm_sql_queries_total counter', metrics.prometheus_text())
+
+    def test_metrics_needs_staff_or_allowed_ip(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 403)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TRUSTED_PROXIES=['10.0.0.1'])
+    def test_metrics_reads_the_client_address_behind_a_trusted_proxy(self):
+        self.client.logout()
+        through_proxy = {'REMOTE_ADDR': '10.0.0.1'}
+        self.assertEqual(self.client.get('/metrics', **through_proxy).status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_X_FORWARDED_FOR='127.0.0.1', **through_proxy).status_code, 200)
+        # Only the hop the proxy appended counts, not what the client claimed
+        spoofed = {'HTTP_X_FORWARDED_FOR': '127.0.0.1, 203.0.113.9', **through_proxy}
+        self.assertEqual(self.client.get('/metrics', **spoofed).status_code, 403)
+        # Nothing is read from the header when the peer isn't a trusted proxy
+        self.assertEqual(
+            self.client.get('/metrics', REMOTE_ADDR='10.1.2.3', HTTP_X_FORWARDED_FOR='127.0.0.1').status_code, 403)
+
+
+class SlowQueryLogTests(TestCase):
+
+    @override_settings(CRM_SLOW_QUERY_MS=0)
+    def test_logs_redacted_params_origin_and_plan(self):
+        with self.assertLogs('core.slow_queries') as logs:
+            list(Client.objects.filter(profile__card_number='4111111111111111', last_name='Smith'))
+
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertIn('core_client', entry['sql'])
+        self.assertEqual(sorted(entry['params'][:2]), ['Smith', '[redacted]'])
+        self.assertNotIn('4111111111111111', logs.output[-1])
+        self.assertTrue(any('core/tests.py' in frame for frame in entry['origin']))
+        self.assertTrue(entry['explain'])
+
+    def test_redacts_insert_values_by_column(self):
+        sql = 'INSERT INTO "core_client" ("first_name", "card_cvv") VALUES (%s, %s), (%s, %s)'
+        self.assertEqual(redact_params(sql, ['Ann', '123', 'Bob', '456']),
+                         ['Ann', '[redacted]', 'Bob', '[redacted]'])
+
+
+@override_settings(CRM_DB_REPLICAS=['replica1', 'replica2'], CRM_DB_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def test_core_reads_go_to_a_replica_and_writes_to_the_primary(self):
+        self.assertIn(self.router.db_for_read(Client), ['replica1', 'replica2'])
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertEqual(self.router.db_for_write(Client), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'core'))
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Client), 'default')
+
+    def test_session_reads_from_the_primary_after_a_post(self):
+        seen = []
+        middleware = ReplicaStickinessMiddleware(lambda request: seen.append(self.router.db_for_read(Client)) or HttpResponse())
+        factory = RequestFactory()
+
+        def send(method):
+            request = getattr(factory, method)('/sales-made/')
+            request.session = session
+            middleware(request)
+            return seen[-1]
+
+        session = {}
+        self.assertNotEqual(send('get'), 'default')
+        self.assertEqual(send('post'), 'default')
+        self.assertEqual(send('get'), 'default')
+
+        session[STICKY_SESSION_KEY] = time.time() - 1
+        self.assertNotEqual(send('get'), 'default')
+        self.assertNotIn(STICKY_SESSION_KEY, session)
+
+    def test_a_request_reads_from_a_single_replica(self):
+        def view(request):
+            seen.append({self.router.db_for_read(Client) for _ in range(20)})
+            return HttpResponse()
+
+        seen = []
+        middleware = ReplicaStickinessMiddleware(view)
+        for _ in range(10):
+            request = RequestFactory().get('/sales-made/')
+            request.session = {}
+            middleware(request)
+        self.assertTrue(all(len(aliases) == 1 for aliases in seen))
+
+
+class RunningTotalTests(TransactionTestCase):
+    # Outside a transaction, reads may be routed to the (mirrored) replicas
+    databases = '__all__'
+
+    def test_concurrent_increments_are_exact(self):
+        threads, posts = 8, 50
+        errors = []
+
+        def post_payments():
+            try:
+                for _ in range(posts):
+                    add_to_total(Decimal('10.01'))
+            except Exception as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post_payments) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(get_total(), Decimal('10.01') * threads * posts)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Plan assertions are written against SQLite's EXPLAIN QUERY PLAN")
+class AdminQueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def changelist_queryset(self, model, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.superuser
+        return admin.site._registry[model].get_changelist_instance(request).queryset
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            if 'SCAN' in line:
+                self.assertIn('INDEX', line, f"full table scan:\n{plan}")
+            self.assertNotIn('TEMP B-TREE', line, f"unindexed sort:\n{plan}")
+
+    def test_client_changelist_uses_indexes(self):
+        queryset = self.changelist_queryset(Client)
+        self.assertUsesIndex(queryset[:100])
+        self.assertUsesIndex(queryset.order_by())
+
+        queryset = self.changelist_queryset(Client, status__exact='active')
+        self.assertUsesIndex(queryset[:100])
+
+    def test_salesmade_changelist_uses_indexes(self):
+        self.assertUsesIndex(self.changelist_queryset(SalesMade)[:100])
+
+    def test_payment_date_range_uses_index(self):
+        queryset = Profile.objects.filter(payment_on__gte=date(2025, 1, 1), payment_on__lt=date(2025, 2, 1))
+        self.assertUsesIndex(queryset.order_by())
+        self.assertIn('profile_payment_on_idx', queryset.order_by().explain())
+
+    def test_interaction_timeline_uses_owner_date_index(self):
+        queryset = keyset_queryset(Interaction.objects.filter(client_id=1), '2025-01-01T00:00:00+00:00_5', field='date')
+        self.assertUsesIndex(queryset[:25])
+        self.assertIn('interaction_client_date_idx', queryset[:25].explain())
+
+    def test_keyset_pages_use_indexes(self):
+        sale = SalesMade.objects.create(first_name='Sale', last_name='One', email='sale@example.com')
+        cursor = encode_cursor(sale)
+        for model in (Client, SalesMade):
+            queryset = self.changelist_queryset(model, cursor=cursor)
+            self.assertUsesIndex(keyset_queryset(queryset, cursor))
+
+
+class KeysetPaginationTests(TestCase):
+
+    def test_walks_every_row_once_in_order(self):
+        now = timezone.now()
+        for i in range(7):
+            client = Client.objects.create(first_name='Lead', last_name=str(i), email=f"lead{i}@example.com")
+            # Pairs of rows share a timestamp to exercise the id tie-break
+            Client.objects.filter(pk=client.pk).update(created_at=now - timedelta(minutes=i // 2))
+        expected = list(Client.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(Client.objects.all(), cursor, per_page=3)
+            seen += [row.pk for row in rows]
+            if not cursor:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_admin_follows_the_cursor(self):
+        superuser = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(superuser)
+        for i in range(3):
+            SalesMade.objects.create(first_name='Sale', last_name=f"Row{i}", email=f"sale{i}@example.com")
+        newest = SalesMade.objects.order_by('-created_at', '-id').first()
+
+        response = self.client.get('/admin/core/salesmade/', {'cursor': encode_cursor(newest)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+        self.assertNotContains(response, newest.email)
@@ -0,0 +1,94 @@
+import zlib
+
+from django.db import transaction
+
+from .models import Client, Interaction, InteractionArchive
+from .pagination import encode_cursor, keyset_page
+
+# Notes rendered in the change-form inline; older ones load on demand
+TIMELINE_INLINE_SIZE = 10
+TIMELINE_PAGE_SIZE = 25
+
+# Owner name in the timeline URL -> Interaction/InteractionArchive column
+OWNER_FIELDS = {
+    'client': 'client_id',
+    'sales': 'sales_made_id',
+}
+
+
+def serialize(entry, archived=False):
+    return {
+        'id': entry.pk,
+        'date': entry.date.isoformat(),
+        'note': entry.note,
+        'archived': archived,
+    }
+
+
+# ---------------------------
+# Reads
+# ---------------------------
+def owner_lookup(owner, pk):
+    """
+    Filter for one owner's notes; converted leads are read through their
+    sale, which shares every note (see Interaction.objects.timeline).
+    """
+    if owner == 'client':
+        sales_made_id = Client.objects.filter(pk=pk).values_list('sales_made_id', flat=True).first()
+        if sales_made_id:
+            return {'sales_made_id': sales_made_id}
+    return {OWNER_FIELDS[owner]: pk}
+
+
+def timeline_page(owner, pk, cursor=None, per_page=TIMELINE_PAGE_SIZE):
+    """
+    One page of an owner's notes, newest first, as ``(entries, next_cursor)``.
+
+    Pages seek on the (owner, date) index with a (date, id) cursor. Archived
+    notes are all older than the live ones, so once the live table runs
+    out the same cursor carries on into the archive.
+    """
+    owner_filter = owner_lookup(owner, pk)
+    live, next_cursor = keyset_page(Interaction.objects.filter(**owner_filter), cursor, per_page, field='date')
+    entries = [serialize(entry) for entry in live]
+    if next_cursor is None and len(entries) < per_page:
+        # Continue into the archive after the last live note on this page
+        archive_cursor = encode_cursor(live[-1], 'date') if live else cursor
+        archived, next_cursor = keyset_page(
+            InteractionArchive.objects.filter(**owner_filter), archive_cursor, per_page - len(entries), field='date',
+        )
+        entries += [serialize(entry, archived=True) for entry in archived]
+    elif next_cursor is None and InteractionArchive.objects.filter(**owner_filter).exists():
+        # This page is exactly full; the archive starts on the next one
+        next_cursor = encode_cursor(live[-1], 'date')
+    return entries, next_cursor
+
+
+# ---------------------------
+# Archiving
+# ---------------------------
+def archive_interactions(cutoff, batch_size=1000):
+    """
+    Move interactions dated before ``cutoff`` into InteractionArchive.
+
+    Each batch is copied and deleted in its own transaction, so the job
+    can be stopped and re-run at any time. Returns the number moved.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Interaction.objects.filter(date__lt=cutoff).order_by('pk')
+                .values_list('pk', 'client_id', 'sales_made_id', 'date', 'note')[:batch_size]
+            )
+            if not batch:
+                return moved
+            InteractionArchive.objects.bulk_create([
+                InteractionArchive(
+                    id=pk, client_id=client_id, sales_made_id=sales_made_id, date=date,
+                    note_compressed=zlib.compress(note.encode(), 9),
+                )
+                for pk, client_id, sales_made_id, date, note in batch
+            ], ignore_conflicts=True)
+            Interaction.objects.filter(pk__in=[row[0] for row in batch]).delete()
+        moved += len(batch)
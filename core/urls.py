@@ -1,7 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.CRM_ASYNC_VIEWS:
+    sales_made_list = views.async_sales_made_list
+    confirm_add_payment = views.async_confirm_add_payment
+else:
+    sales_made_list = views.sales_made_list
+    confirm_add_payment = views.confirm_add_payment
+
 urlpatterns = [
-    path('sales-made/', views.sales_made_list, name='sales_made_list'),
-    path('add-payment/<int:client_id>/', views.confirm_add_payment, name='confirm_add_payment'),
+    path('sales-made/', sales_made_list, name='sales_made_list'),
+    path('add-payment/<int:client_id>/', confirm_add_payment, name='confirm_add_payment'),
+    path('reports/funnel/', views.funnel_report, name='funnel_report'),
 ]
@@ -1,24 +1,152 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from .models import Client, TotalPayments
+import hashlib
+from datetime import date, datetime, timezone
+from functools import wraps
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render, aget_object_or_404, get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition
+
+from .cache import page_cache
+from .metrics import prometheus_text
+from .models import Client
+from .pagination import CURSOR_VAR, akeyset_page, keyset_page
+from .payments import aget_total, get_total, record_payment
+from .reporting import DIMENSIONS, funnel
+from .routers import recently_written, use_primary
+from .signals import sales_list_changed_at
+
+SALES_LIST_CACHE_TIMEOUT = 300
+
+
+def _sales_list_version(request):
+    # One database read per request, shared by the ETag, Last-Modified and cache key
+    if not hasattr(request, '_sales_list_changed_at'):
+        request._sales_list_changed_at = sales_list_changed_at()
+    return request._sales_list_changed_at
+
+
+def _load_sales_list_version(view):
+    """condition() calls its functions synchronously, so async views read the version first."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request._sales_list_changed_at = await sync_to_async(sales_list_changed_at)()
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _sales_list_etag(request):
+    cursor = request.GET.get(CURSOR_VAR, '')
+    return hashlib.md5(f"{_sales_list_version(request)}|{cursor}".encode()).hexdigest()
 
-def sales_made_list(request):
-    clients = Client.objects.filter(sales_made=True)
-    total, _ = TotalPayments.objects.get_or_create(id=1)
 
-    return render(request, 'core/sales_made_list.html', {
+def _sales_list_last_modified(request):
+    return datetime.fromtimestamp(_sales_list_version(request), tz=timezone.utc)
+
+
+def _sales_list_cache_key(request):
+    # Rendered pages are cached per version; any change starts a new version
+    return f"core:sales-list:page:{_sales_list_etag(request)}"
+
+
+def _render_sales_list(request, clients, next_cursor, total):
+    return render_to_string('core/sales_made_list.html', {
         'clients': clients,
-        'total': total
-    })
+        'total': total,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get(CURSOR_VAR),
+    }, request=request)
+
+
+def _converted_clients():
+    return Client.objects.filter(sales_made__isnull=False).with_profile()
+
+
+@condition(etag_func=_sales_list_etag, last_modified_func=_sales_list_last_modified)
+def sales_made_list(request):
+    key = _sales_list_cache_key(request)
+    content = page_cache.get(key)
+    if content is None:
+        # The page is cached for everyone, so it mustn't come from a replica missing the change
+        with use_primary(recently_written(_sales_list_version(request))):
+            clients, next_cursor = keyset_page(_converted_clients(), request.GET.get(CURSOR_VAR))
+            content = _render_sales_list(request, clients, next_cursor, get_total())
+        page_cache.set(key, content, SALES_LIST_CACHE_TIMEOUT)
+    return HttpResponse(content)
 
 
 def confirm_add_payment(request, client_id):
-    client = get_object_or_404(Client, id=client_id)
+    client = get_object_or_404(Client.objects.with_profile().select_related('sales_made'), id=client_id)
+
+    if request.method == "POST":
+        record_payment(client.payment_amount, sales_made=client.sales_made)
+        return redirect('sales_made_list')
+
+    return render(request, 'core/confirm_add_payment.html', {
+        'client': client
+    })
+
+
+def _client_ip(request):
+    """
+    The address that sent the request. Behind the proxies listed in
+    METRICS_TRUSTED_PROXIES it is the last X-Forwarded-For hop that isn't
+    one of them (earlier entries are whatever the client claimed).
+    """
+    address = request.META.get('REMOTE_ADDR')
+    forwarded = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    while address in settings.METRICS_TRUSTED_PROXIES and forwarded:
+        address = forwarded.pop()
+    return address
+
+
+def metrics(request):
+    is_staff = request.user.is_authenticated and request.user.is_staff
+    if not is_staff and _client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def funnel_report(request):
+    """Lead funnel and revenue as JSON, read from the weekly rollups only."""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        raise PermissionDenied
+    group_by = request.GET.get('group_by', 'source')
+    if group_by not in DIMENSIONS:
+        return HttpResponseBadRequest(f"group_by must be one of {', '.join(DIMENSIONS)}")
+    try:
+        since = date.fromisoformat(request.GET['since']) if request.GET.get('since') else None
+    except ValueError:
+        return HttpResponseBadRequest("since must be an ISO date (YYYY-MM-DD)")
+    return JsonResponse({'group_by': group_by, 'since': since and since.isoformat(), 'rows': funnel(group_by, since)})
+
+
+# ---------------------------
+# Async versions (served under ASGI, see CRM_ASYNC_VIEWS)
+# ---------------------------
+@_load_sales_list_version
+@condition(etag_func=_sales_list_etag, last_modified_func=_sales_list_last_modified)
+async def async_sales_made_list(request):
+    key = _sales_list_cache_key(request)
+    content = await page_cache.aget(key)
+    if content is None:
+        with use_primary(recently_written(_sales_list_version(request))):
+            clients, next_cursor = await akeyset_page(_converted_clients(), request.GET.get(CURSOR_VAR))
+            content = _render_sales_list(request, clients, next_cursor, await aget_total())
+        await page_cache.aset(key, content, SALES_LIST_CACHE_TIMEOUT)
+    return HttpResponse(content)
+
+
+async def async_confirm_add_payment(request, client_id):
+    client = await aget_object_or_404(Client.objects.with_profile().select_related('sales_made'), id=client_id)
 
     if request.method == "POST":
-        total, _ = TotalPayments.objects.get_or_create(id=1)
-        total.total_amount += client.payment_amount
-        total.save()
+        # The ledger row, rollups and total are written in one transaction,
+        # which the async ORM can't open, so this part runs in a thread.
+        await sync_to_async(record_payment)(client.payment_amount, sales_made=client.sales_made)
         return redirect('sales_made_list')
 
     return render(request, 'core/confirm_add_payment.html', {
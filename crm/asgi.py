@@ -3,6 +3,10 @@ ASGI config for crm project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run with an ASGI server, e.g.::
+
+    uvicorn crm.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -12,5 +16,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crm.settings')
+# ASGI profile: serve the async sales views
+os.environ.setdefault('CRM_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
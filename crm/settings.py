@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,8 +45,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'core.metrics.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Needs the session; reads after a write stay on the primary
+    'core.routers.ReplicaStickinessMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -52,32 +60,211 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'crm.urls'
 
+# Addresses allowed to scrape /metrics without a staff login. They are
+# matched against REMOTE_ADDR, which behind a reverse proxy is the proxy's
+# own address; list the proxies in CRM_TRUSTED_PROXIES (comma-separated)
+# so the client address is taken from the X-Forwarded-For they append to.
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TRUSTED_PROXIES = [ip for ip in os.environ.get('CRM_TRUSTED_PROXIES', '').split(',') if ip]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory (reset by the dev autoreloader)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'crm.wsgi.application'
+ASGI_APPLICATION = 'crm.asgi.application'
+
+# Route the public sales views to their async versions. crm/asgi.py turns
+# this on, so an ASGI server (e.g. uvicorn crm.asgi:application) gets them
+# without extra configuration; WSGI keeps the sync views.
+CRM_ASYNC_VIEWS = os.environ.get('CRM_ASYNC_VIEWS') == '1'
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# CRM_DB_ENGINE picks the profile:
+#   sqlite (default) - development; WAL journal, busy timeout, synchronous=NORMAL
+#   postgresql       - production; CRM_DB_NAME/USER/PASSWORD/HOST/PORT,
+#                      persistent connections (CRM_DB_CONN_MAX_AGE) with health
+#                      checks, or a psycopg connection pool (CRM_DB_POOL=1)
+
+CRM_DB_ENGINE = os.environ.get('CRM_DB_ENGINE', 'sqlite')
+
+if CRM_DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('CRM_DB_NAME', 'crm'),
+            'USER': os.environ.get('CRM_DB_USER', 'crm'),
+            'PASSWORD': os.environ.get('CRM_DB_PASSWORD', ''),
+            'HOST': os.environ.get('CRM_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('CRM_DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('CRM_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('CRM_DB_POOL') == '1':
+        # The pool replaces persistent connections; Django requires CONN_MAX_AGE = 0
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('CRM_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('CRM_DB_POOL_MAX', 10)),
+            'timeout': int(os.environ.get('CRM_DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('CRM_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked"
+                'timeout': int(os.environ.get('CRM_DB_BUSY_TIMEOUT', 20)),
+                # Take the write lock up front instead of failing on upgrade
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets readers run alongside the single writer
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            },
+            # A file (not in-memory) test database, so concurrent tests see real locking.
+            # It lives outside the checkout, one per test run unless CRM_TEST_DB_NAME
+            # names a fixed file (e.g. for --keepdb).
+            'TEST': {'NAME': os.environ.get(
+                'CRM_TEST_DB_NAME', Path(tempfile.gettempdir()) / f'crm-test-{os.getpid()}.sqlite3',
+            )},
+        }
     }
+
+# Read replicas
+# CRM_DB_REPLICAS lists replica hosts (postgresql) or, for sqlite, database
+# files standing in for replicas locally (copied from the primary with
+# sync_replica). They become aliases replica1, replica2, ... and
+# core.routers sends reads of core models to them; a session that wrote
+# reads from the primary for CRM_DB_STICKY_SECONDS. Tests mirror them to
+# the primary.
+
+CRM_DB_REPLICAS = []
+for _index, _location in enumerate(filter(None, os.environ.get('CRM_DB_REPLICAS', '').split(',')), 1):
+    _replica = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    _replica['HOST' if CRM_DB_ENGINE == 'postgresql' else 'NAME'] = _location
+    DATABASES[f'replica{_index}'] = _replica
+    CRM_DB_REPLICAS.append(f'replica{_index}')
+
+CRM_DB_STICKY_SECONDS = float(os.environ.get('CRM_DB_STICKY_SECONDS', 5))
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# CRM_CACHE_BACKEND picks the backend for both caches:
+#   locmem (default) - per-process memory
+#   file             - shared directory, CRM_CACHE_LOCATION (default BASE_DIR / 'cache')
+#   redis            - CRM_CACHE_LOCATION, e.g. redis://127.0.0.1:6379/1 (needs redis-py)
+# "default" holds rendered pages and sessions, "crm" holds small hot values
+# such as the payment totals and change-list counts.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CRM_CACHE_BACKEND = os.environ.get('CRM_CACHE_BACKEND', 'locmem')
+
+
+def _cache(name, timeout, max_entries):
+    location = os.environ.get('CRM_CACHE_LOCATION')
+    if CRM_CACHE_BACKEND == 'file':
+        location = str(Path(location or BASE_DIR / 'cache') / name)
+    elif CRM_CACHE_BACKEND == 'locmem':
+        location = f"crm-{name}"
+    config = {
+        'BACKEND': CACHE_BACKENDS[CRM_CACHE_BACKEND],
+        'LOCATION': location,
+        'TIMEOUT': int(os.environ.get('CRM_CACHE_TIMEOUT', timeout)),
+        'KEY_PREFIX': name,
+    }
+    if CRM_CACHE_BACKEND != 'redis':
+        # Eviction: once MAX_ENTRIES is reached, 1/CULL_FREQUENCY of the keys are dropped
+        config['OPTIONS'] = {
+            'MAX_ENTRIES': int(os.environ.get('CRM_CACHE_MAX_ENTRIES', max_entries)),
+            'CULL_FREQUENCY': int(os.environ.get('CRM_CACHE_CULL_FREQUENCY', 3)),
+        }
+    return config
+
+
+CACHES = {
+    'default': _cache('default', timeout=300, max_entries=5000),
+    'crm': _cache('crm', timeout=60, max_entries=1000),
+}
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+# Slow query log
+# core queries slower than CRM_SLOW_QUERY_MS are appended, with card/SSN
+# parameters redacted and the backend's EXPLAIN output, to a rotating
+# JSON Lines file.
+
+CRM_SLOW_QUERY_MS = float(os.environ.get('CRM_SLOW_QUERY_MS', 200))
+CRM_SLOW_QUERY_LOG = os.environ.get('CRM_SLOW_QUERY_LOG', BASE_DIR / 'logs' / 'slow_queries.jsonl')
+
+
+# Field encryption
+# Card and identity columns (core.fields.EncryptedCharField) are encrypted
+# with the first of CRM_FIELD_KEYS, comma-separated secrets, newest first.
+# Older keys only decrypt rows that rotate_field_keys hasn't reached yet.
+# Without the variable, development (DEBUG) falls back to SECRET_KEY;
+# anywhere else it is required.
+
+CRM_FIELD_KEYS = [key for key in os.environ.get('CRM_FIELD_KEYS', '').split(',') if key]
+if not CRM_FIELD_KEYS:
+    if not DEBUG:
+        raise ImproperlyConfigured("Set CRM_FIELD_KEYS: card and identity columns must not be keyed by SECRET_KEY.")
+    CRM_FIELD_KEYS = [SECRET_KEY]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': CRM_SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'raw',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 
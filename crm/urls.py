@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core import views as core_views
+
 urlpatterns = [
+    path('admin/crm/', include('core.admin_urls')),
     path('admin/', admin.site.urls),
+    path('metrics', core_views.metrics, name='metrics'),
     path('', include('core.urls')),
 ]